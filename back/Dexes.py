@@ -1,12 +1,28 @@
 
-from copy import deepcopy
 import json
+import marshal
+from bisect import bisect_left, bisect_right
+import os
 import re
-from typing import Callable, Generic, Optional, Type, TypeVar
+from sys import intern
+from typing import Callable, Generic, Iterable, Optional, Type, TypeVar, Union
 
+import numpy as np
+
+import back.bitmap as bitmap
+import back.columns as columns
+import back.fuzzy as fuzzy
+import back.similarity as similarity
+import back.textindex as textindex
+from back.columns import Columns, toBitmap, toMask
+from back.fuzzy import FuzzyIndex, foldName
 from back.pokeapi import RawEvolutions, RawMoves, RawStats
+from back.similarity import MinHashIndex, SimilarityIndex
+from back.snapshot import getCodeStamp, loadSnapshot, pausedGC, writeSnapshot
+from back.textindex import BM25Index
 
 class DexItem:
+    __slots__ = ("name", "fancy")
     def __init__(self, name: str, fancy: str):
         self.name = name
         self.fancy = fancy
@@ -16,20 +32,30 @@ class DexItem:
     
     def dispName(self):
         return self.fancy
+    
+    @staticmethod
+    def getRawText(raw: dict) -> Optional[str]:
+        """ The text of a raw record that can be searched, if the kind of item has any. """
+        return None
 
 _effectReplacer = re.compile(r"\$effect_chance")
+def _intern(s):
+    # Types, colours, shapes and gens repeat across the whole dex, so every item shares one copy of each.
+    return intern(s) if isinstance(s, str) else s
+
 class Move(DexItem):
+    __slots__ = ("typ", "pow", "acc", "cls", "effect", "effectChance", "target", "pp", "gen")
     def __init__(self, rawName: str, name: str, typ: str, pow: int, acc: int, clas: str, effect: str, effectChance: int, target: str, pp: int, gen: str):
         super().__init__(rawName, name)
-        self.typ = typ
+        self.typ = _intern(typ)
         self.pow = pow
         self.acc = acc
-        self.cls = clas
+        self.cls = _intern(clas)
         self.effect = effect
         self.effectChance = effectChance
-        self.target = target
+        self.target = _intern(target)
         self.pp = pp
-        self.gen = gen
+        self.gen = _intern(gen)
     
     def getType(self): return self.typ
     def getPower(self): return self.pow
@@ -43,6 +69,10 @@ class Move(DexItem):
 
     def getIsPhysical(self): return self.cls == "physical"
     
+    @staticmethod
+    def getRawText(raw: dict):
+        return _effectReplacer.sub(str(raw["effectChance"]), raw["effect"] or "")
+    
     def dispType(self): return self.typ.title()
     def dispDamageClass(self): return self.cls.title()
     def dispEffect(self): return _effectReplacer.sub(str(self.effectChance), self.effect)
@@ -56,11 +86,28 @@ class Method:
     EGG = "egg"
     TUTOR = "tutor"
 
+    __slots__ = ("typ", "gen", "lvl")
+    # Methods are immutable and most learned moves share the same handful, so they're handed out from one pool.
+    _pool: dict[tuple[str, str, Optional[int]], "Method"] = {}
+
     def __init__(self, typ: str, gen: str, lvl: Optional[int]):
         self.typ = typ
         self.gen = gen
         self.lvl = lvl
     
+    @classmethod
+    def pooled(cls, typ: str, gen: str, lvl: Optional[int]) -> "Method":
+        key = (typ, gen, lvl)
+        method = cls._pool.get(key)
+        if method is None:
+            method = cls._pool[key] = cls(intern(typ), intern(gen), lvl)
+        return method
+    
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo: dict):
+        return self
+    
     def getLvl(self): return self.lvl
     
     def dispType(self): return self.typ.title()
@@ -73,37 +120,40 @@ class Method:
             return "Gen ?"
 
 class Ability(DexItem):
+    __slots__ = ("effect", "gen")
     def __init__(self, rawName: str, name: str, effect: str, gen: str):
         super().__init__(rawName, name)
         self.effect = effect
-        self.gen = gen
+        self.gen = _intern(gen)
     
     def getEffect(self):
         return self.effect
     def getGen(self):
         return self.gen
+    
+    @staticmethod
+    def getRawText(raw: dict):
+        return raw["effect"]
 
 class LearnedMove:
+    __slots__ = ("name", "methods")
     def __init__(self, name: str, methods: list[tuple[str, str, int]]):
-        self.name = name
+        self.name = intern(name)
         self.methods = LearnedMove.populateMethods(methods)
-        self.prevo = None
     
     @staticmethod
     def populateMethods(raw: list[tuple[str, str, int]]):
         methods: dict[str, Method] = {}
         for gen, typ, lvl in raw:
-            methods[typ] = Method(typ, gen, lvl if typ==Method.LEVEL else None)
+            methods[typ] = Method.pooled(typ, gen, lvl if typ==Method.LEVEL else None)
         return methods
     
     def getName(self):
         return self.name
     def getMethod(self, method: str):
         return self.methods.get(method)
-    def getNewWithPrevo(self, prevo: str):
-        new = deepcopy(self)
-        new.prevo = prevo
-        return new
+    def getNewWithPrevo(self, prevo: "Pokemon"):
+        return InheritedMove(self, prevo)
     
     def getFromDex(self):
         return MOVEDEX.get(self.name)
@@ -111,9 +161,32 @@ class LearnedMove:
     def dispName(self):
         return self.getFromDex().dispName()
     def dispMethods(self):
-        methodsStr = ", ".join(f"{method.dispType()}" for method in self.methods.values())
-        if not self.prevo: return methodsStr
-        return f"{methodsStr} as {self.prevo}"
+        return ", ".join(f"{method.dispType()}" for method in self.methods.values())
+
+class InheritedMove:
+    """ A read-only view of a move that a Pokemon can only know by learning it as one of its prevolutions. """
+
+    __slots__ = ("move", "source")
+    def __init__(self, move: LearnedMove, source: "Pokemon"):
+        object.__setattr__(self, "move", move)
+        object.__setattr__(self, "source", source)
+    
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+    
+    def getName(self):
+        return self.move.getName()
+    def getMethod(self, method: str):
+        return self.move.getMethod(method)
+    def getSource(self):
+        return self.source
+    def getFromDex(self):
+        return self.move.getFromDex()
+    
+    def dispName(self):
+        return self.move.dispName()
+    def dispMethods(self):
+        return f"{self.move.dispMethods()} as {self.source.dispName()}"
 
 class Enum:
     @classmethod
@@ -141,9 +214,10 @@ class TRIGGERS(Enum):
     OTHER = "other"
 
 class Stat:
+    __slots__ = ("typ", "val", "ev")
     def __init__(self, typ: str, val: int, ev: int):
-        self.typ = typ,
-        self.val = val,
+        self.typ = typ
+        self.val = val
         self.ev = ev
     
     def getTyp(self): return self.typ
@@ -151,8 +225,9 @@ class Stat:
     def getEV(self): return self.ev
 
 class Evolution:
+    __slots__ = ("into", "method", "details")
     def __init__(self, into: str, method: str, details: dict[str, str]):
-        self.into = into
+        self.into = intern(into)
         self.method = method
         self.details = details
     
@@ -222,7 +297,30 @@ class Evolution:
         method = ", ".join(method)
         return method
 
+def getRawPrevolutions(name: str, raw: RawEvolutions):
+    """ The Pokemon that `name` evolves from, directly or not, from the first in its evolution line.
+        Dexes scraped before each species' parent was recorded only have the chain in order, so everything before `name` is taken instead. """
+
+    if any(len(evo) < 3 for evo in raw):
+        prevolutions: list[str] = []
+        for evo in raw:
+            if evo[0] == name:
+                break
+            prevolutions.append(evo[0])
+        return prevolutions
+    parents = {evo[0]: evo[2] for evo in raw}
+    prevolutions = []
+    parent = parents.get(name)
+    while parent and not parent in prevolutions:
+        prevolutions.append(parent)
+        parent = parents.get(parent)
+    return prevolutions[::-1]
+
 class Pokemon(DexItem):
+    __slots__ = (
+        "id", "battleOnly", "height", "weight", "abilities", "hiddenAbility", "moves", "stats", "types", "varieties",
+        "evolutions", "prevolutions", "eggGroups", "isBaby", "isLegendary", "isMythical", "color", "shape", "gen"
+    )
     def __init__(self,
         rawName: str, id: int, name: str,
         height: int, weight: int,
@@ -239,20 +337,20 @@ class Pokemon(DexItem):
         self.battleOnly = battleOnly
         self.height = height
         self.weight = weight
-        self.abilities = abilities
-        self.hiddenAbility = hiddenAbility
+        self.abilities = [_intern(ability) for ability in abilities]
+        self.hiddenAbility = _intern(hiddenAbility)
         self.moves = self.populateMoves(moves)
         self.stats = self.populateStats(stats)
-        self.types = types
+        self.types = [_intern(typ) for typ in types]
         self.varieties = varieties
         self.evolutions, self.prevolutions = self.populateEvolutions(evolutions)
-        self.eggGroups = groups
+        self.eggGroups = [_intern(group) for group in groups]
         self.isBaby = baby
         self.isLegendary = legendary
         self.isMythical = mythical
-        self.color = color
-        self.shape = shape
-        self.gen = gen
+        self.color = _intern(color)
+        self.shape = _intern(shape)
+        self.gen = _intern(gen)
     def populateMoves(self, raw: RawMoves):
         moves: dict[str, LearnedMove] = {}
         for name in raw:
@@ -266,16 +364,10 @@ class Pokemon(DexItem):
         return stats
     def populateEvolutions(self, raw: RawEvolutions):
         evolutions: list[Evolution] = []
-        prevolutions: list[str] = []
-        noMorePrevos = False
         for evo in raw:
-            if evo[0] == self.getName():
-                noMorePrevos = True
-            elif not noMorePrevos:
-                prevolutions.append(evo[0])
             for trigger, details in evo[1]:
                 evolutions.append(Evolution(evo[0], TRIGGERS.match(trigger), details))
-        return evolutions, prevolutions
+        return evolutions, getRawPrevolutions(self.getName(), raw)
     
     def getID(self): return self.id
     def getHeight(self): return round(self.height * 0.1, 1)
@@ -323,22 +415,19 @@ class Pokemon(DexItem):
         if not targetMethod == Method.LEVEL:
             return sorted([move.getFromDex().dispName() for move in [move for move in self.moves.values() if move.getMethod(targetMethod)]])
         else:
-            moves: list[LearnedMove] = []
-            for moveName in self.moves:
-                move = self.moves[moveName]
-                method = move.getMethod(targetMethod)
-                if not method: continue
-                moves.append(move)
-            moves.sort(key=lambda move: move.getMethod(targetMethod).getLvl())
+            # Pokemon in the dex have their level-up moves sorted already.
+            levelMoves = POKEDEX.getLevelMoves(self.name)
+            if levelMoves is None:
+                moves = [move for move in self.moves.values() if move.getMethod(targetMethod)]
+                levelMoves = sorted(((move.getMethod(targetMethod).getLvl(), move.getName()) for move in moves), key=lambda pair: pair[0])
             moveStrs: list[str] = []
             lastLvl = None
-            for move in moves:
-                method = move.getMethod(targetMethod)
-                if lastLvl != method.getLvl():
-                    lastLvl = method.getLvl()
-                    moveStrs.append(f"{lastLvl}:\n{move.getFromDex().dispName()}")
+            for lvl, moveName in levelMoves:
+                if lastLvl != lvl:
+                    lastLvl = lvl
+                    moveStrs.append(f"{lastLvl}:\n{MOVEDEX.get(moveName).dispName()}")
                 else:
-                    moveStrs.append(f"{move.getFromDex().dispName()}")
+                    moveStrs.append(f"{MOVEDEX.get(moveName).dispName()}")
             return moveStrs
     def dispClassifications(self):
         return (
@@ -351,70 +440,445 @@ class Pokemon(DexItem):
     def hasForms(self): return len(self.varieties) != 1
     def hasClassifications(self): return self.getIsBaby() or self.getIsLegendary() or self.getIsMythical()
     def hasMove(self, move: Move): return move.getName() in self.moves
-
-    def searchMoves(self, targets: set[str]):
-        for moveName in self.moves:
-            learnedMove = self.moves[moveName]
-            move = learnedMove.getFromDex()
-            if not move:
-                print(learnedMove.getName())
-            if move.getName() in targets or move.dispName().lower() in targets:
-                return True
-        return False
-    def searchAbilities(self, targets: set[str]):
-        for abilityName in self.getAbilities() + ([self.getHiddenAbility()] if self.hasHiddenAbility() else []):
-            ability = ABILITYDEX.get(abilityName)
-            if ability.getName() in targets or ability.dispName().lower() in targets:
-                return True
-        return False
-    def searchTypes(self, targets: set[str]):
-        for typ in self.getTypes():
-            if typ in targets:
-                return True
-        return False
     
 T = TypeVar("T", bound="DexItem")
 class Dex(Generic[T]):
+    # How to get the values of each indexed attribute from a raw record.
+    ATTRIBUTES: dict[str, Callable[[dict], Iterable[str]]] = {}
+    # How to get each numeric field from a raw record.
+    COLUMNS: dict[str, Callable[[dict], Union[int, float]]] = {}
+
     items: dict[str, T]
-    def __init__(self, data: dict[str, dict], cls: Type[T]):
-        self.items = {}
+    raw: dict[str, Union[dict, bytes]]
+    names: list[str]
+    ids: dict[str, int]
+    indexes: dict[str, dict[str, int]]
+    attributeValues: dict[str, list[str]]
+    cardinalities: dict[str, dict[str, int]]
+    columns: Columns
+    def __init__(self, data: dict[str, dict], cls: Type[T], *, lazy: bool=False):
         self.cls = cls
-        for item in data:
-            self.items[item] = self.cls(rawName=item, **data[item])
+        self.lazy = lazy
+        self.load(data)
+    
+    def load(self, data: dict[str, dict]):
+        """ (Re)builds the dex from raw records. A lazy dex keeps the records and only builds each item the first time it's needed. """
+
+        self.items = {}
+        self.raw = {}
+        self.fancies = {}
+        # Every item gets a dense ID so that sets of items can be stored as bitmaps.
+        self.names = list(data)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.universe = self.buildUniverse(data)
+        if self.lazy:
+            self.raw = data
+            for name in data:
+                self.fancies[name] = data[name]["name"]
+        else:
+            for name in data:
+                self.items[name] = self.cls(rawName=name, **data[name])
+                self.fancies[name] = self.items[name].dispName()
+        # Folded display names, so that `Flabébé`, `flabebe` and `Fla Bebe` all find the same item without a scan.
+        self.byDispName = {}
+        for name in self.names:
+            folded = foldName(self.fancies[name] or "")
+            if folded and not folded in self.byDispName:
+                self.byDispName[folded] = name
+        # A full-text index over whatever text the items have, like the effects of moves and abilities.
+        texts = [self.cls.getRawText(data[name]) for name in self.names]
+        self.text = BM25Index(texts) if any(texts) else None
+        self.buildIndexes(data)
+        self.columns = self.buildColumns(data)
     
-    def get(self, name: str):
-        return self.items.get(name)
+    def buildUniverse(self, data: dict[str, dict]):
+        return bitmap.full(len(self.names))
     
-    def searchByNames(self, nameList: set[str]):
-        for name in nameList:
-            if self.items.get(name):
-                return self.items.get(name)
-        for item in self.items.values():
-            if item.dispName().lower() in nameList:
-                return item
+    def buildIndexes(self, data: dict[str, dict]):
+        # Inverted indexes from the folded name of each value of each attribute to the bitmap of items that have it.
+        ids: dict[str, dict[str, list[int]]] = {attribute: {} for attribute in self.ATTRIBUTES}
+        for i, name in enumerate(self.names):
+            raw = data[name]
+            for attribute in self.ATTRIBUTES:
+                for value in self.ATTRIBUTES[attribute](raw):
+                    if not value: continue
+                    value = foldName(value)
+                    if not value in ids[attribute]:
+                        ids[attribute][value] = []
+                    ids[attribute][value].append(i)
+        self.indexes = {attribute: {value: bitmap.fromIDs(ids[attribute][value]) for value in ids[attribute]} for attribute in ids}
+        # The distinct values of each attribute, before any display names are added to the indexes.
+        self.attributeValues = {attribute: list(ids[attribute]) for attribute in ids}
+        # How many items a query can get back for each value, so that the most selective clauses can be evaluated first.
+        self.cardinalities = {attribute: {value: bitmap.count(bits & self.universe) for value, bits in index.items()} for attribute, index in self.indexes.items()}
+    
+    def buildColumns(self, data: dict[str, dict]):
+        return Columns({column: [self.COLUMNS[column](data[name]) for name in self.names] for column in self.COLUMNS})
+    
+    def __getstate__(self):
+        # Snapshots of lazy dexes store each record as its own marshal blob so that loading one doesn't have to decode them all.
+        state = self.__dict__.copy()
+        if self.lazy:
+            state["items"] = {}
+            state["raw"] = {name: raw if isinstance(raw, bytes) else marshal.dumps(raw) for name, raw in self.raw.items()}
+        return state
+    
+    def getRaw(self, name: str) -> dict:
+        raw = self.raw[name]
+        if isinstance(raw, bytes):
+            raw = self.raw[name] = marshal.loads(raw)
+        return raw
+    
+    def build(self, name: str):
+        item = self.cls(rawName=name, **self.getRaw(name))
+        self.items[name] = item
+        return item
+    
+    def get(self, name: str) -> Optional[T]:
+        item = self.items.get(name)
+        if item is None and name in self.raw:
+            item = self.build(name)
+        return item
+    
+    def values(self):
+        for name in self.names:
+            yield self.get(name)
+    
+    def getByDispName(self, dispName: str):
+        name = self.byDispName.get(foldName(dispName))
+        return self.get(name) if name else None
     
     def getAllNames(self):
-        return list(self.items.keys())
+        return list(self.names)
+    
+    def getSize(self):
+        return len(self.names)
+    
+    def getNameByID(self, i: int):
+        return self.names[i]
+    
+    def getDispName(self, name: str):
+        return self.fancies[name]
+    
+    def searchText(self, query: str):
+        """ Returns the bitmap of the items whose text has every word in `query`, and every item's score for it. """
+
+        if not self.text:
+            return 0, np.zeros(len(self.names))
+        matched, scores = self.text.search(query)
+        return toBitmap(matched) & self.universe, scores
+    
+    def getColumns(self):
+        return self.columns
     
-    def collect(self, key: Callable[[T], bool]):
-        collected: set[T] = set()
-        for itemName in self.items:
-            if key(self.items[itemName]):
-                collected.add(self.items[itemName])
-        return collected
+    def indexDisplayNames(self, attribute: str, dex: "Dex"):
+        """ Lets an attribute whose values are items of `dex` also be looked up by their display names. """
+
+        index = self.indexes[attribute]
+        cardinalities = self.cardinalities[attribute]
+        for name in dex.getAllNames():
+            value = foldName(name)
+            dispName = foldName(dex.getDispName(name))
+            if value in index and not dispName in index:
+                index[dispName] = index[value]
+                cardinalities[dispName] = cardinalities[value]
+    
+    def lookup(self, attribute: str, value: str):
+        """ The bitmap of items whose `attribute` has `value`, by either its raw or display name. """
+
+        return self.indexes[attribute].get(foldName(value), 0)
+    
+    def getCardinality(self, attribute: str, value: str):
+        """ How many items a query can get back whose `attribute` has `value`. """
+
+        return self.cardinalities[attribute].get(foldName(value), 0)
+    
+    def getValues(self, attribute: str):
+        return list(self.attributeValues[attribute])
+    
+    def select(self, column: str, op: str, *values: Union[int, float]):
+        """ The bitmap of items whose `column` compares to `values` with `op`, which is either a comparison or `between`. """
+
+        if op == "between":
+            mask = self.columns.between(column, *values)
+        else:
+            mask = self.columns.compare(column, op, *values)
+        return toBitmap(mask) & self.universe
+    
+    def getOneHot(self, attribute: str):
+        """ A matrix with a row per item and a column per value of `attribute`, set where the item has the value. """
+
+        index = self.indexes[attribute]
+        return np.column_stack([toMask(index[value], len(self.names)) for value in self.attributeValues[attribute]])
+    
+    def getUniverse(self):
+        """ The bitmap of every item that queries on this dex can return. """
+
+        return self.universe
+    
+    def encode(self, items: Iterable[T]):
+        return bitmap.fromIDs(self.ids[item.getName()] for item in items)
+    
+    def encodeNames(self, names: Iterable[str]):
+        return bitmap.fromIDs(self.ids[name] for name in names if name in self.ids)
+    
+    def decode(self, bits: int):
+        return {self.get(self.names[i]) for i in bitmap.iterIDs(bits)}
+    
+    def filter(self, bits: int, key: Callable[[T], bool]):
+        """ Returns the bitmap of the items in `bits` that pass `key`, without testing anything outside of `bits`. """
+
+        return bitmap.fromIDs(i for i in bitmap.iterIDs(bits) if key(self.get(self.names[i])))
+
+_ROMAN = {"i": 1, "ii": 2, "iii": 3, "iv": 4, "v": 5, "vi": 6, "vii": 7, "viii": 8, "ix": 9}
+def _getGenNumber(gen: Union[str, int, None]):
+    # Gens are usually like `generation-iv`, but moves added by hand use plain numbers.
+    if isinstance(gen, int):
+        return gen
+    return _ROMAN.get((gen or "").split("-")[-1], 0)
+
+def _getNumber(value: Optional[Union[int, float]]):
+    # Missing values, like the power of a status move, never compare true.
+    return np.nan if value is None else value
+
+class Movedex(Dex[Move]):
+    ATTRIBUTES = {
+        "type": lambda raw: [raw["typ"]],
+        "class": lambda raw: [raw["clas"]],
+        "target": lambda raw: [raw["target"]],
+    }
+    COLUMNS = {
+        "power": lambda raw: _getNumber(raw["pow"]),
+        "accuracy": lambda raw: _getNumber(raw["acc"]),
+        "pp": lambda raw: _getNumber(raw["pp"]),
+        "chance": lambda raw: _getNumber(raw["effectChance"]),
+        "gen": lambda raw: _getGenNumber(raw["gen"]),
+    }
+
+class Abilitydex(Dex[Ability]):
+    COLUMNS = {
+        "gen": lambda raw: _getGenNumber(raw["gen"]),
+    }
+
+def _getRawAbilities(raw: dict):
+    return raw["abilities"] + ([raw["hiddenAbility"]] if raw["hiddenAbility"] else [])
 
 class Pokedex(Dex[Pokemon]):
-    def collect(self, key: Callable[[Pokemon], bool]):
-        collected: set[Pokemon] = set()
-        for itemName in self.items:
-            if key(self.items[itemName]) and not self.items[itemName].getBattleOnly():
-                collected.add(self.items[itemName])
-        return collected
-
-def createDex(path: str, cls: Type[T], *, dexCls: Type[Dex]=Dex) -> Dex[T]:
-    with open(path, "r") as f:
-        return dexCls(json.load(f), cls)
-
-POKEDEX = createDex("./sources/dexes/pokedex.json", Pokemon, dexCls=Pokedex)
-MOVEDEX = createDex("./sources/dexes/movedex.json", Move)
-ABILITYDEX = createDex("./sources/dexes/abilitydex.json", Ability)
+    ATTRIBUTES = {
+        "move": lambda raw: raw["moves"],
+        "ability": _getRawAbilities,
+        "type": lambda raw: raw["types"],
+        "color": lambda raw: [raw["color"]],
+        "group": lambda raw: raw["groups"],
+    }
+    FLAGS = ["baby", "legendary", "mythical"]
+
+    similarity: Optional[SimilarityIndex]
+    learnsetSimilarity: Optional[MinHashIndex]
+    flags: dict[str, int]
+    levelMoves: dict[str, tuple[list[int], list[str]]]
+    levelLearners: dict[str, tuple[list[int], list[int]]]
+    prevolutions: dict[str, list[str]]
+    learnsets: dict[str, dict[str, list[Union[LearnedMove, InheritedMove]]]]
+    def load(self, data: dict[str, dict]):
+        super().load(data)
+        # The evolution graph, as the prevolutions of each Pokemon that are in the dex.
+        self.prevolutions = {}
+        for name in self.names:
+            self.prevolutions[name] = [prevo for prevo in getRawPrevolutions(name, data[name]["evolutions"]) if prevo in self.ids]
+        self.learnsets = {}
+        self.similarity = None
+        self.learnsetSimilarity = None
+        # The flags are only kept for the Pokemon that can show up in results.
+        self.flags = {flag: bitmap.fromIDs(i for i, name in enumerate(self.names) if data[name][flag]) & self.universe for flag in self.FLAGS}
+        self.buildLevelIndex(data)
+    
+    def buildLevelIndex(self, data: dict[str, dict]):
+        """ Every level-up move in level order, both for each Pokemon and for each move, so that a level range is two bisects away.
+            A move learned by level-up in more than one game uses the same level as the Pokemon's learned move does. """
+
+        learners: dict[str, list[tuple[int, int]]] = {}
+        self.levelMoves = {}
+        for i, name in enumerate(self.names):
+            learned: list[tuple[int, str]] = []
+            for moveName, methods in data[name]["moves"].items():
+                lvl = None
+                for _, typ, methodLvl in methods:
+                    if typ == Method.LEVEL:
+                        lvl = methodLvl
+                if lvl is None: continue
+                learned.append((lvl, moveName))
+                move = foldName(moveName)
+                if not move in learners:
+                    learners[move] = []
+                learners[move].append((lvl, i))
+            learned.sort(key=lambda pair: pair[0])
+            self.levelMoves[name] = ([lvl for lvl, _ in learned], [moveName for _, moveName in learned])
+        self.levelLearners = {}
+        for move, pairs in learners.items():
+            pairs.sort()
+            self.levelLearners[move] = ([lvl for lvl, _ in pairs], [i for _, i in pairs])
+    
+    def getLevelMoves(self, name: str, low: int=0, high: Optional[int]=None) -> Optional[list[tuple[int, str]]]:
+        """ The moves the Pokemon learns by level-up between `low` and `high`, in level order, or None if the Pokemon isn't in the dex. """
+
+        if not name in self.levelMoves:
+            return None
+        levels, moves = self.levelMoves[name]
+        start = bisect_left(levels, low)
+        end = len(levels) if high is None else bisect_right(levels, high)
+        return list(zip(levels[start:end], moves[start:end]))
+    
+    def getLevelLearners(self, move: str, low: int=0, high: Optional[int]=None):
+        """ The bitmap of Pokemon that learn `move` by level-up between `low` and `high`. """
+
+        levels, ids = self.levelLearners.get(foldName(move), ([], []))
+        start = bisect_left(levels, low)
+        end = len(levels) if high is None else bisect_right(levels, high)
+        return bitmap.fromIDs(ids[start:end]) & self.universe
+    
+    def buildUniverse(self, data: dict[str, dict]):
+        # Battle-only forms never show up in results.
+        return super().buildUniverse(data) & ~bitmap.fromIDs(i for i, name in enumerate(self.names) if data[name]["battleOnly"])
+    
+    def buildColumns(self, data: dict[str, dict]):
+        """ Every numeric field, by ID: the base stats and their total, the EV yields and their total, and the height, weight, dex number and gen.
+            Heights and weights are in metres and kilograms, like they're displayed. """
+
+        stats = [STATS.HP, STATS.ATK, STATS.DEF, STATS.SPATK, STATS.SPDEF, STATS.SPD]
+        columns: dict[str, list] = {column: [] for column in ["id", "gen", "bst", "evs", "height", "weight"] + stats + [f"{stat}-ev" for stat in stats]}
+        for name in self.names:
+            raw = data[name]
+            columns["id"].append(raw["id"])
+            columns["gen"].append(_getGenNumber(raw["gen"]))
+            columns["height"].append(round(raw["height"] * 0.1, 1))
+            columns["weight"].append(round(raw["weight"] * 0.1, 1))
+            for stat in stats:
+                val, ev = raw["stats"].get(stat, (0, 0))
+                columns[stat].append(val)
+                columns[f"{stat}-ev"].append(ev)
+            columns["bst"].append(sum(columns[stat][-1] for stat in stats))
+            columns["evs"].append(sum(columns[f"{stat}-ev"][-1] for stat in stats))
+        return Columns(columns)
+    
+    # How much sharing a type or an ability counts for next to the base stats, which each span 0 to 1.
+    SIMILAR_TYPE_WEIGHT = 0.5
+    SIMILAR_ABILITY_WEIGHT = 0.35
+    def getSimilar(self, name: str, k: int=10):
+        """ The `k` Pokemon whose base stats, types and abilities are closest to those of `name`, closest first, with their distances.
+            The vectors they're compared by are built the first time they're needed. """
+
+        if self.similarity is None:
+            stats = np.column_stack([self.columns.get(stat) for stat in [STATS.HP, STATS.ATK, STATS.DEF, STATS.SPATK, STATS.SPDEF, STATS.SPD]])
+            self.similarity = SimilarityIndex(stats, [
+                (self.getOneHot("type"), self.SIMILAR_TYPE_WEIGHT),
+                (self.getOneHot("ability"), self.SIMILAR_ABILITY_WEIGHT),
+            ])
+        found = self.similarity.search(self.ids[name], k, toMask(self.universe, len(self.names)))
+        return [(self.get(self.names[i]), distance) for i, distance in found]
+    
+    def getSimilarLearnsets(self, name: str, k: int=10):
+        """ The `k` Pokemon whose own learnsets overlap the most with that of `name`, most similar first, with the estimated fraction of moves they share.
+            Only Pokemon that are likely to share at least around 40% of their moves are considered. """
+
+        if self.learnsetSimilarity is None:
+            self.learnsetSimilarity = MinHashIndex([np.flatnonzero(row) for row in self.getOneHot("move")])
+        found = self.learnsetSimilarity.search(self.ids[name], k, toMask(self.universe, len(self.names)))
+        return [(self.get(self.names[i]), similarity) for i, similarity in found]
+    
+    def getFlag(self, flag: str):
+        return self.flags[flag]
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["learnsets"] = {}
+        state["similarity"] = None
+        state["learnsetSimilarity"] = None
+        return state
+    
+    def getLearnset(self, name: str):
+        """ Every move the Pokemon can know, including those it can only learn as one of its prevolutions.
+            Each move maps to the ways it can be learned: the Pokemon's own if it learns the move itself, otherwise one per prevolution that does.
+            Learnsets are built the first time they're asked for. """
+
+        learnset = self.learnsets.get(name)
+        if learnset is not None:
+            return learnset
+        pkmn = self.get(name)
+        learnset = {moveName: [pkmn.getMove(moveName)] for moveName in pkmn.getMoves()}
+        inherited: dict[str, list[InheritedMove]] = {}
+        for prevoName in self.prevolutions[name]:
+            prevo = self.get(prevoName)
+            for moveName in prevo.getMoves():
+                if moveName in learnset: continue
+                if not moveName in inherited:
+                    inherited[moveName] = []
+                inherited[moveName].append(prevo.getMove(moveName).getNewWithPrevo(prevo))
+        learnset.update(inherited)
+        self.learnsets[name] = learnset
+        return learnset
+
+class NameIndex:
+    """ A fuzzy index over the raw and display names of every item in a list of dexes, built the first time it's searched. """
+
+    def __init__(self, dexes: list[Dex]):
+        self.dexes = dexes
+        self.index: Optional[FuzzyIndex[tuple[int, str]]] = None
+    
+    def build(self):
+        self.index = FuzzyIndex()
+        for dexIndex, dex in enumerate(self.dexes):
+            for name in dex.getAllNames():
+                self.index.add(name, (dexIndex, name))
+                self.index.add(dex.getDispName(name), (dexIndex, name))
+    
+    def search(self, query: str, dexes: Optional[list[Dex]]=None) -> list[DexItem]:
+        """ Returns the items whose names are closest to `query`, optionally only from `dexes`.
+            Ties are broken by the order the dexes were given in. """
+
+        if not self.index:
+            self.build()
+        # Short names are too easy to turn into other names with two edits.
+        maxDistance = 1 if len(foldName(query)) <= 4 else 2
+        ranked = sorted(self.index.search(query, maxDistance), key=lambda found: (found[0], found[1][0]))
+        return [self.dexes[dexIndex].get(name) for _, (dexIndex, name) in ranked if dexes is None or self.dexes[dexIndex] in dexes]
+    
+    def find(self, query: str, dexes: Optional[list[Dex]]=None) -> Optional[DexItem]:
+        found = self.search(query, dexes)
+        return found[0] if found else None
+
+# Snapshots go stale whenever this module or one whose objects they pickle is edited. Bump this if they need to go stale for any other reason.
+DEX_FORMAT = 18
+DEX_VERSION = (DEX_FORMAT, getCodeStamp([__file__, bitmap.__file__, columns.__file__, fuzzy.__file__, similarity.__file__, textindex.__file__]))
+USE_SNAPSHOTS = not os.getenv("MUOS_NO_DEX_SNAPSHOTS")
+
+def loadDex(path: str, cls: Type[T], dexCls: Type[Dex]=Dex, lazy: bool=False) -> Dex[T]:
+    with open(path, "r") as f, pausedGC():
+        return dexCls(json.load(f), cls, lazy=lazy)
+
+def compileDex(path: str, cls: Type[T], *, dexCls: Type[Dex]=Dex, lazy: bool=False) -> Dex[T]:
+    dex = loadDex(path, cls, dexCls, lazy)
+    writeSnapshot(path, DEX_VERSION, dex)
+    return dex
+
+def createDex(path: str, cls: Type[T], *, dexCls: Type[Dex]=Dex, lazy: bool=False, snapshot: bool=USE_SNAPSHOTS) -> Dex[T]:
+    if not snapshot:
+        return loadDex(path, cls, dexCls, lazy)
+    return loadSnapshot(path, DEX_VERSION, lambda: loadDex(path, cls, dexCls, lazy))
+
+POKEDEX_PATH = "./sources/dexes/pokedex.json"
+MOVEDEX_PATH = "./sources/dexes/movedex.json"
+ABILITYDEX_PATH = "./sources/dexes/abilitydex.json"
+
+def compileDexes():
+    compileDex(POKEDEX_PATH, Pokemon, dexCls=Pokedex, lazy=True)
+    compileDex(MOVEDEX_PATH, Move, dexCls=Movedex)
+    compileDex(ABILITYDEX_PATH, Ability, dexCls=Abilitydex)
+
+# Most lookups only ever touch a handful of Pokemon, so the Pokedex builds them on demand.
+POKEDEX: Pokedex = createDex(POKEDEX_PATH, Pokemon, dexCls=Pokedex, lazy=True)
+MOVEDEX: Movedex = createDex(MOVEDEX_PATH, Move, dexCls=Movedex)
+ABILITYDEX: Abilitydex = createDex(ABILITYDEX_PATH, Ability, dexCls=Abilitydex)
+POKEDEX.indexDisplayNames("move", MOVEDEX)
+POKEDEX.indexDisplayNames("ability", ABILITYDEX)
+NAMES = NameIndex([POKEDEX, MOVEDEX, ABILITYDEX])
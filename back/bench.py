@@ -0,0 +1,168 @@
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from copy import deepcopy
+from typing import Callable
+
+import back.Dexes as Dexes
+from back.Dexes import ABILITYDEX_PATH, MOVEDEX_PATH, POKEDEX, POKEDEX_PATH, Ability, Abilitydex, Method, Move, Movedex, Pokedex, Pokemon, compileDexes, loadDex
+
+def timeIt(func: Callable[[], object], repeat: int):
+    best = None
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        func()
+        toc = time.perf_counter()
+        best = toc - tic if best is None else min(best, toc - tic)
+    return best
+
+_importDexes = "import time; import back.pokeapi; tic = time.perf_counter(); import back.Dexes; print(time.perf_counter() - tic)"
+def timeFreshImport(env: dict[str, str]):
+    out = subprocess.run([sys.executable, "-c", _importDexes], env={**os.environ, **env}, capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+def benchSnapshots(repeat: int=5):
+    """ Compares how long a fresh interpreter takes to load the dexes from JSON and from fresh snapshots. """
+
+    compileDexes()
+    fromJSON = min(timeFreshImport({"MUOS_NO_DEX_SNAPSHOTS": "1"}) for _ in range(repeat))
+    fromSnapshot = min(timeFreshImport({}) for _ in range(repeat))
+    print(f"Dex startup (best of {repeat}): json {round(fromJSON * 1000, 1)}ms, snapshot {round(fromSnapshot * 1000, 1)}ms ({round(fromJSON / fromSnapshot, 1)}x)")
+
+@contextmanager
+def unpooled():
+    """ Builds dex items the way they were before Method objects were pooled and repeated strings interned. """
+
+    pooled, intern, _intern = Method.__dict__["pooled"], Dexes.intern, Dexes._intern
+    Method.pooled = classmethod(lambda cls, typ, gen, lvl: cls(typ, gen, lvl))
+    Dexes.intern = Dexes._intern = lambda s: s
+    try:
+        yield
+    finally:
+        Method.pooled, Dexes.intern, Dexes._intern = pooled, intern, _intern
+
+def traceDex(path: str, cls: type, dexCls: type):
+    """ How many bytes a freshly built dex keeps alive, as traced by tracemalloc. The Method pool starts empty, so that it's counted too. """
+
+    pool, Method._pool = Method._pool, {}
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dex = loadDex(path, cls, dexCls)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    Method._pool = pool
+    return after - before, dex
+
+def benchMemory():
+    """ Compares how much memory each fully built dex keeps alive with and without pooled methods and interned strings. """
+
+    print("Resident dex memory:")
+    for path, cls, dexCls in [(POKEDEX_PATH, Pokemon, Pokedex), (MOVEDEX_PATH, Move, Movedex), (ABILITYDEX_PATH, Ability, Abilitydex)]:
+        with unpooled():
+            before, _ = traceDex(path, cls, dexCls)
+        after, dex = traceDex(path, cls, dexCls)
+        print(f"  {path}: {round(after / 1024 / 1024, 2)}MiB for {len(dex.getAllNames())} items, "
+            f"{round(before / 1024 / 1024, 2)}MiB unpooled ({round((1 - after / before) * 100, 1)}% saved)")
+
+def benchCheck(names: list[str]=["sylveon", "umbreon", "gardevoir", "gallade"], repeat: int=20):
+    """ Times `check` for every move each Pokemon can know, both with a cold learnset and a memoized one,
+        and compares the inherited move views it builds against deep copies of the learned moves. """
+
+    print(f"check on long evolution lines (best of {repeat}):")
+    for name in names:
+        if not POKEDEX.get(name): continue
+        def cold():
+            POKEDEX.learnsets.pop(name, None)
+            return POKEDEX.getLearnset(name)
+        moves = list(cold())
+        def check():
+            learnset = POKEDEX.getLearnset(name)
+            return [learnset.get(move) for move in moves]
+        coldTime = timeIt(lambda: (cold(), check()), repeat)
+        warmTime = timeIt(check, repeat)
+        pkmn = POKEDEX.get(name)
+        learnedMoves = [(POKEDEX.get(prevo).getMove(move), POKEDEX.get(prevo)) for prevo in POKEDEX.prevolutions[name] for move in POKEDEX.get(prevo).getMoves() if not pkmn.getMove(move)]
+        viewTime = timeIt(lambda: [learnedMove.getNewWithPrevo(prevo) for learnedMove, prevo in learnedMoves], repeat)
+        copyTime = timeIt(lambda: [deepcopy(learnedMove) for learnedMove, _ in learnedMoves], repeat)
+        print(f"  {name} for {len(moves)} moves: cold {round(coldTime * 1000, 3)}ms, warm {round(warmTime * 1000, 3)}ms; "
+            f"{len(learnedMoves)} inherited: views {round(viewTime * 1000, 3)}ms, deep copies {round(copyTime * 1000, 3)}ms")
+
+def benchRanges(repeat: int=20):
+    """ Compares numeric range selections on the column store against looping over every Pokemon. """
+
+    print(f"Range selections (best of {repeat}):")
+    for column, op, values, key in [
+        ("speed", ">", (100,), lambda pkmn: pkmn.getBase("speed").getVal() > 100),
+        ("bst", "between", (500, 600), lambda pkmn: 500 <= sum(stat.getVal() for stat in pkmn.stats.values()) <= 600),
+        ("weight", "<", (10,), lambda pkmn: pkmn.getWeight() < 10),
+    ]:
+        columnTime = timeIt(lambda: POKEDEX.select(column, op, *values), repeat)
+        loopTime = timeIt(lambda: POKEDEX.filter(POKEDEX.getUniverse(), key), repeat)
+        print(f"  {column} {op} {values}: columns {round(columnTime * 1000, 3)}ms, loop {round(loopTime * 1000, 3)}ms")
+
+def benchSimilar(repeat: int=20):
+    """ Times nearest-neighbour searches over the whole Pokedex once the vectors are built. """
+
+    names = POKEDEX.getAllNames()[:50]
+    buildTime = timeIt(lambda: (setattr(POKEDEX, "similarity", None), POKEDEX.getSimilar(names[0])), 1)
+    searchTime = timeIt(lambda: [POKEDEX.getSimilar(name) for name in names], repeat) / len(names)
+    print(f"similar over {POKEDEX.getSize()} Pokemon: building the vectors {round(buildTime * 1000, 2)}ms, {round(searchTime * 1000, 3)}ms per search")
+    buildTime = timeIt(lambda: (setattr(POKEDEX, "learnsetSimilarity", None), POKEDEX.getSimilarLearnsets(names[0])), 1)
+    searchTime = timeIt(lambda: [POKEDEX.getSimilarLearnsets(name) for name in names], repeat) / len(names)
+    print(f"similar learnsets over {POKEDEX.getSize()} Pokemon: building the MinHash index {round(buildTime * 1000, 2)}ms, {round(searchTime * 1000, 3)}ms per search")
+
+def benchLevels(names: list[str]=["gardevoir", "gallade"], moves: list[str]=["heat-wave", "thunderbolt"], repeat: int=20):
+    """ Compares level range scans on the level-up index against sorting every Pokemon's level-up moves. """
+
+    print(f"Level ranges (best of {repeat}):")
+    for name in names:
+        if not POKEDEX.get(name): continue
+        pkmn = POKEDEX.get(name)
+        indexTime = timeIt(lambda: POKEDEX.getLevelMoves(name, 20, 40), repeat)
+        sortTime = timeIt(lambda: [move for move in sorted((move for move in pkmn.moves.values() if move.getMethod(Method.LEVEL)), key=lambda move: move.getMethod(Method.LEVEL).getLvl()) if 20 <= move.getMethod(Method.LEVEL).getLvl() <= 40], repeat)
+        print(f"  {name} between 20 and 40: index {round(indexTime * 1000, 3)}ms, sorting {round(sortTime * 1000, 3)}ms")
+    for move in moves:
+        indexTime = timeIt(lambda: POKEDEX.getLevelLearners(move, 0, 30), repeat)
+        def scan():
+            return POKEDEX.filter(POKEDEX.getUniverse(), lambda pkmn: pkmn.getMove(move) is not None and pkmn.getMove(move).getMethod(Method.LEVEL) is not None and pkmn.getMove(move).getMethod(Method.LEVEL).getLvl() <= 30)
+        scanTime = timeIt(scan, repeat)
+        print(f"  {move} by level 30: index {round(indexTime * 1000, 3)}ms, scan {round(scanTime * 1000, 3)}ms")
+
+def benchQueries(queries: list[str]=["pokemon with speed > 100 and type fire", "moves with power > 80 sort by power desc", "pokemon with moves tackle, defense curl"], repeat: int=20):
+    """ Compares compiling queries every time they're asked against looking them up in a plan cache, the way the bot does. """
+
+    from back.query import PlanCache, normalizeQuery
+    from front.CogDex import CogDex
+    cog = CogDex(None)
+    cache = PlanCache()
+    def cached(query: str):
+        normalized = normalizeQuery(query)
+        plan = cache.get(normalized)
+        if not plan:
+            plan = cog.compile(normalized, query)
+            cache.put(normalized, plan)
+        return plan
+    print(f"Query plans (best of {repeat}):")
+    for query in queries:
+        compileTime = timeIt(lambda: cog.compile(normalizeQuery(query), query), repeat)
+        cacheTime = timeIt(lambda: cached(query), repeat)
+        print(f"  {query}: compiling {round(compileTime * 1000, 3)}ms, cached {round(cacheTime * 1000, 3)}ms")
+    print(f"  {cache.report()}")
+
+def main():
+    benchSnapshots()
+    benchMemory()
+    benchCheck()
+    benchRanges()
+    benchSimilar()
+    benchLevels()
+    benchQueries()
+
+if __name__ == "__main__":
+    main()
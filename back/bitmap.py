@@ -0,0 +1,25 @@
+from typing import Iterable, Iterator
+
+# Sets of dex items are stored as Python ints, where bit `i` is set when the item with ID `i` is in the set.
+# `&`, `|` and `~` then work across the whole dex at once.
+
+def fromIDs(ids: Iterable[int]) -> int:
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+def iterIDs(bitmap: int) -> Iterator[int]:
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+def full(size: int) -> int:
+    return (1 << size) - 1
+
+def count(bitmap: int) -> int:
+    return bin(bitmap).count("1")
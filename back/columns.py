@@ -0,0 +1,64 @@
+from typing import Union
+
+import numpy as np
+
+# Numeric fields are stored one array per field, where element `i` belongs to the item with ID `i`.
+# Comparisons then run over the whole dex at once and give back boolean masks, which convert to and from bitmaps.
+
+Number = Union[int, float]
+
+COMPARISONS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "=": np.equal,
+    "!=": np.not_equal,
+}
+
+def toBitmap(mask: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+def toMask(bitmap: int, size: int) -> np.ndarray:
+    packed = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=size, bitorder="little").astype(bool)
+
+class Columns:
+    """ A column store of the numeric fields of every item in a dex. """
+
+    def __init__(self, columns: dict[str, list[Number]]):
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        # Arrays handed out can't be changed by whoever asked for them.
+        for column in self.columns.values():
+            column.flags.writeable = False
+        self.orders: dict[tuple[str, bool], np.ndarray] = {}
+
+    def __contains__(self, column: str):
+        return column in self.columns
+
+    def get(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def getNames(self):
+        return list(self.columns)
+
+    def getOrder(self, column: str, descending: bool=False) -> np.ndarray:
+        """ The IDs sorted by `column`, worked out the first time they're asked for. Ties stay in ID order either way. """
+
+        key = (column, descending)
+        if not key in self.orders:
+            values = self.columns[column]
+            order = np.argsort(-values if descending else values, kind="stable")
+            order.flags.writeable = False
+            self.orders[key] = order
+        return self.orders[key]
+
+    def compare(self, column: str, op: str, value: Number) -> np.ndarray:
+        return COMPARISONS[op](self.columns[column], value)
+
+    def between(self, column: str, low: Number, high: Number) -> np.ndarray:
+        """ Both ends are included, and they can be given in either order. """
+
+        values = self.columns[column]
+        low, high = min(low, high), max(low, high)
+        return (values >= low) & (values <= high)
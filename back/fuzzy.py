@@ -0,0 +1,86 @@
+import unicodedata
+from typing import Generic, Hashable, Optional, TypeVar
+
+E = TypeVar("E", bound=Hashable)
+
+def foldName(name: str):
+    """ Folds case, accents, punctuation and whitespace out of a name, so that `Flabébé`, `flabebe` and `FLA-BE BE` all compare equal. """
+
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    return "".join(char for char in decomposed if char.isalnum())
+
+def getDistance(a: str, b: str, maxDistance: int):
+    """ The optimal string alignment distance between `a` and `b`, or `maxDistance + 1` if it's any larger than `maxDistance`. """
+
+    if abs(len(a) - len(b)) > maxDistance:
+        return maxDistance + 1
+    prevPrev: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        rowMin = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prevPrev[j - 2] + 1)
+            rowMin = min(rowMin, current[j])
+        if rowMin > maxDistance:
+            return maxDistance + 1
+        prevPrev, prev = prev, current
+    return prev[-1] if prev[-1] <= maxDistance else maxDistance + 1
+
+def getDeletes(term: str, maxDistance: int):
+    deletes = {term}
+    frontier = {term}
+    for _ in range(maxDistance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        deletes |= frontier
+    return deletes
+
+class FuzzyIndex(Generic[E]):
+    """ A symmetric delete index: every term is stored under each string that's a few deletions away from its prefix.
+        A query only has to generate its own deletions to find every term within `maxDistance` edits of it,
+        instead of generating every possible edit and looking each one up. """
+
+    def __init__(self, maxDistance: int=2, prefixLength: int=7):
+        self.maxDistance = maxDistance
+        self.prefixLength = prefixLength
+        self.terms: dict[str, list[E]] = {}
+        self.deletes: dict[str, set[str]] = {}
+
+    def add(self, term: str, entry: E):
+        term = foldName(term)
+        if not term:
+            return
+        if not term in self.terms:
+            self.terms[term] = []
+            for delete in getDeletes(term[:self.prefixLength], self.maxDistance):
+                if not delete in self.deletes:
+                    self.deletes[delete] = set()
+                self.deletes[delete].add(term)
+        if not entry in self.terms[term]:
+            self.terms[term].append(entry)
+
+    def search(self, query: str, maxDistance: Optional[int]=None):
+        """ Returns every entry whose term is within `maxDistance` edits of `query`, closest first. """
+
+        if maxDistance is None:
+            maxDistance = self.maxDistance
+        maxDistance = min(maxDistance, self.maxDistance)
+        query = foldName(query)
+        if not query:
+            return []
+        distances: dict[str, int] = {}
+        for delete in getDeletes(query[:self.prefixLength], maxDistance):
+            for term in self.deletes.get(delete, ()):
+                if term in distances: continue
+                distances[term] = getDistance(query, term, maxDistance)
+        ranked: list[tuple[int, E]] = []
+        seen: set[E] = set()
+        for term in sorted((term for term in distances if distances[term] <= maxDistance), key=lambda term: distances[term]):
+            for entry in self.terms[term]:
+                if entry in seen: continue
+                seen.add(entry)
+                ranked.append((distances[term], entry))
+        return ranked
@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+
+import aiohttp
+import requests
+
+# Only the headers needed to decode a body are kept alongside it.
+KEPT_HEADERS = ["content-type"]
+# A server that's busy, rate limiting or takes longer than REQUEST_TIMEOUT seconds to answer is asked again after a while,
+#  up to RETRIES times, waiting twice as long each time.
+RETRY_STATUSES = {429, 503}
+RETRIES = 4
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+REQUEST_TIMEOUT = 30.0
+
+class NotCached(Exception):
+    def __init__(self, url: str):
+        super().__init__(f"{url} isn't in the HTTP cache, and requests can't be made offline")
+        self.url = url
+
+class BadStatus(Exception):
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} responded with status {status}")
+        self.url = url
+        self.status = status
+
+def getRetryDelay(attempt: int, responseHeaders):
+    """ How long to wait before asking again, as the server's Retry-After if it gives one in seconds. """
+
+    retryAfter = responseHeaders.get("retry-after", "")
+    if retryAfter.isdigit():
+        return min(float(retryAfter), MAX_RETRY_DELAY)
+    return min(RETRY_DELAY * 2 ** attempt, MAX_RETRY_DELAY)
+
+def checkStatus(url: str, status: int):
+    """ Only a page or a reply that it didn't change is usable. Anything else, like an error page, must not be parsed as the page. """
+
+    if status not in (200, 304):
+        raise BadStatus(url, status)
+
+def request(url: str, headers: dict[str, str]={}) -> tuple[int, bytes, Any]:
+    """ Returns the status, body and headers of a usable response for `url`, retrying while the server is busy or stalled. """
+
+    for attempt in range(RETRIES + 1):
+        try:
+            r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.Timeout:
+            if attempt == RETRIES:
+                raise
+            time.sleep(getRetryDelay(attempt, {}))
+            continue
+        if r.status_code not in RETRY_STATUSES or attempt == RETRIES:
+            break
+        time.sleep(getRetryDelay(attempt, r.headers))
+    checkStatus(url, r.status_code)
+    return r.status_code, r.content, r.headers
+
+async def requestAsync(session: aiohttp.ClientSession, url: str, headers: dict[str, str]={}) -> tuple[int, bytes, Any]:
+    for attempt in range(RETRIES + 1):
+        try:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as r:
+                status, body, responseHeaders = r.status, await r.read(), r.headers
+        except asyncio.TimeoutError:
+            if attempt == RETRIES:
+                raise
+            await asyncio.sleep(getRetryDelay(attempt, {}))
+            continue
+        if status not in RETRY_STATUSES or attempt == RETRIES:
+            break
+        await asyncio.sleep(getRetryDelay(attempt, responseHeaders))
+    checkStatus(url, status)
+    return status, body, responseHeaders
+
+def writeFile(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as f:
+        f.write(data)
+    os.replace(tmpPath, path)
+
+class HTTPCache:
+    """ Responses kept on disk between runs. Bodies are stored under the hash of their content, and each URL remembers
+        the ETag and Last-Modified of its last response, so that asking for it again only transfers the body if it changed.
+        Offline, every response comes from the cache, and a URL that was never fetched raises NotCached. """
+
+    def __init__(self, directory: str, offline: bool=False):
+        self.directory = directory
+        self.offline = offline
+        self.resetCounts()
+
+    def resetCounts(self):
+        """ Starts counting responses again, so that a report only covers one run. """
+
+        self.downloaded = 0
+        self.downloadedBytes = 0
+        self.revalidated = 0
+        self.fromDisk = 0
+
+    def getEntryPath(self, url: str):
+        return os.path.join(self.directory, "urls", hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def getBodyPath(self, digest: str):
+        return os.path.join(self.directory, "bodies", digest[:2], digest)
+
+    def readEntry(self, url: str) -> Optional[dict[str, Any]]:
+        """ The validators, headers and body hash of the last response for `url`, or None if there isn't a usable one. """
+
+        try:
+            with open(self.getEntryPath(url), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or not os.path.exists(self.getBodyPath(entry["digest"])):
+            return None
+        return entry
+
+    def readBody(self, entry: dict[str, Any]):
+        with open(self.getBodyPath(entry["digest"]), "rb") as f:
+            return f.read()
+
+    def write(self, url: str, body: bytes, headers: dict[str, str], responseHeaders):
+        digest = hashlib.sha256(body).hexdigest()
+        if not os.path.exists(self.getBodyPath(digest)):
+            writeFile(self.getBodyPath(digest), body)
+        entry = {
+            "url": url,
+            "digest": digest,
+            "etag": responseHeaders.get("etag"),
+            "lastModified": responseHeaders.get("last-modified"),
+            "headers": headers
+        }
+        writeFile(self.getEntryPath(url), json.dumps(entry).encode())
+
+    def getConditionalHeaders(self, entry: Optional[dict[str, Any]]):
+        headers: dict[str, str] = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["lastModified"]:
+            headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def getOffline(self, url: str, entry: Optional[dict[str, Any]]):
+        if not entry:
+            raise NotCached(url)
+        self.fromDisk += 1
+        return self.readBody(entry), entry["headers"]
+
+    def receive(self, url: str, entry: Optional[dict[str, Any]], status: int, body: bytes, responseHeaders):
+        """ Returns the body and kept headers for a usable response, from the cache if it wasn't modified. """
+
+        if status == 304 and entry:
+            self.revalidated += 1
+            return self.readBody(entry), entry["headers"]
+        self.downloaded += 1
+        self.downloadedBytes += len(body)
+        headers = {name: responseHeaders[name] for name in KEPT_HEADERS if name in responseHeaders}
+        self.write(url, body, headers, responseHeaders)
+        return body, headers
+
+    def get(self, url: str) -> tuple[bytes, dict[str, str]]:
+        entry = self.readEntry(url)
+        if self.offline:
+            return self.getOffline(url, entry)
+        return self.receive(url, entry, *request(url, self.getConditionalHeaders(entry)))
+
+    async def getAsync(self, session: aiohttp.ClientSession, url: str) -> tuple[bytes, dict[str, str]]:
+        entry = self.readEntry(url)
+        if self.offline:
+            return self.getOffline(url, entry)
+        return self.receive(url, entry, *await requestAsync(session, url, self.getConditionalHeaders(entry)))
+
+    def report(self):
+        return (f"HTTP cache: {self.downloaded} downloaded ({round(self.downloadedBytes / 1024 / 1024, 2)}MiB), "
+            f"{self.revalidated} unchanged since the last run, {self.fromDisk} read offline")
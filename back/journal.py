@@ -0,0 +1,77 @@
+import json
+import os
+from typing import Any, Optional
+
+class Journal:
+    """ An append-only file of every entry built during a run, one JSON line each, written as soon as the entry is done.
+        A run that stops partway leaves its journal behind, and the next run skips every entry already in it.
+        Only where each entry's line starts is kept in memory; the entries themselves are read back one at a time. """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets: dict[str, int] = {}
+        self.urls: dict[str, str] = {}
+        self.pages: dict[str, dict[str, str]] = {}
+        self.file = None
+        self.reader = None
+        self.read()
+
+    def read(self):
+        """ Indexes the entries already in the journal. A line cut off partway by a crash is dropped. """
+
+        if not os.path.exists(self.path):
+            return
+        end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    name, url, pages, _ = json.loads(line)
+                except ValueError:
+                    break
+                self.offsets[name] = end
+                self.urls[name] = url
+                self.pages[name] = pages
+                end += len(line)
+        os.truncate(self.path, end)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def has(self, name: str, url: str):
+        return self.urls.get(name) == url
+
+    def add(self, name: str, url: str, item: Any, pages: dict[str, str]):
+        if not self.file:
+            self.file = open(self.path, "ab")
+        line = (json.dumps([name, url, pages, item]) + "\n").encode()
+        self.offsets[name] = self.file.tell()
+        self.urls[name] = url
+        self.pages[name] = pages
+        self.file.write(line)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def getItem(self, name: str) -> Any:
+        if self.file:
+            self.file.flush()
+        if not self.reader:
+            self.reader = open(self.path, "rb")
+        self.reader.seek(self.offsets[name])
+        return json.loads(self.reader.readline())[3]
+
+    def getPages(self, name: str) -> Optional[dict[str, str]]:
+        return self.pages.get(name)
+
+    def close(self):
+        for f in [self.file, self.reader]:
+            if f:
+                f.close()
+        self.file = None
+        self.reader = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,13 +1,45 @@
 
+import asyncio
+import hashlib
+import inspect
 import json
+import os
 import re
+import sys
 import time
-from typing import Any, Callable, Optional, Union
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Generator, Optional, TypeVar, Union
 
+import aiohttp
 import bs4
 import requests
 from bs4 import BeautifulSoup
 
+from back.httpcache import HTTPCache, request, requestAsync
+from back.journal import Journal
+
+T = TypeVar("T")
+
+# Both can point at a local server instead, like a stub for testing or a mirror.
+POKEAPI_URL = os.getenv("MUOS_POKEAPI_URL", "https://pokeapi.co/api/v2")
+POKEMONDB_URL = os.getenv("MUOS_POKEMONDB_URL", "https://pokemondb.net")
+# Rebuilds ask only for what changed since the last one, or with MUOS_OFFLINE, nothing at all. An empty MUOS_HTTP_CACHE turns the cache off.
+HTTP_CACHE_DIR = os.getenv("MUOS_HTTP_CACHE", "./sources/cache")
+HTTP_CACHE = HTTPCache(HTTP_CACHE_DIR, offline=bool(os.getenv("MUOS_OFFLINE"))) if HTTP_CACHE_DIR else None
+
+# Builders that need more pages than the resource they're given are generators: they yield the URL of each page they need,
+#  along with how to parse it, and are sent back the parsed page. Fetching is left to whoever runs them, so the same builder
+#  can be run one request at a time or alongside many others, and both give the same dex.
+# Parsed pages can be shared between builders, so builders must not change them.
+Request = tuple[str, Optional[Callable[[str], Any]]]
+Fetching = Generator[Request, Any, T]
+
+def fetchJSON(url: str) -> Fetching[Any]:
+    return (yield (url, json.loads))
+
+def fetchPage(url: str) -> Fetching[str]:
+    return (yield (url, None))
+
 NamedResource = dict[str, str]
 
 spacePat = r"[^\w]"
@@ -59,7 +91,8 @@ RawMoves = dict[str, list[tuple[str, str, str]]]
 RawStats = dict[str, tuple[int, int]]
 RawTypes = list[str]
 _RawDetails = list[tuple[str, dict[str, str]]]
-RawEvolutions = list[tuple[str, _RawDetails]]
+# Each species in the chain, with how it evolves and what it evolves from.
+RawEvolutions = list[tuple[str, _RawDetails, Optional[str]]]
 RawEggGroups = list[str]
 
 RawPkmn = dict[str, Union[
@@ -79,21 +112,21 @@ RawPkmn = dict[str, Union[
 # Pokemon
 ####
 
-def getPokemon(aPkmn: PAPokemon):
-    aSpcs: PASpecies = json.loads(requests.get(aPkmn["species"]["url"]).text)
+def getPokemon(aPkmn: PAPokemon) -> Fetching[RawPkmn]:
+    aSpcs: PASpecies = yield from fetchJSON(aPkmn["species"]["url"])
 
     pkmn: RawPkmn = {}
 
-    pkmn["id"], pkmn["name"], pkmn["battleOnly"] = getIDAndName(aPkmn["id"], aSpcs["varieties"], aPkmn["forms"], aSpcs["names"])
+    pkmn["id"], pkmn["name"], pkmn["battleOnly"] = yield from getIDAndName(aPkmn["id"], aSpcs["varieties"], aPkmn["forms"], aSpcs["names"])
     pkmn["height"] = aPkmn["height"]
     pkmn["weight"] = aPkmn["weight"]
     pkmn["abilities"], pkmn["hiddenAbility"] = getAbilities(aPkmn["abilities"])
     pkmn["varieties"] = getVarieties(aSpcs["varieties"])
     pkmn["moves"] = getMoves(aPkmn["moves"])
-    addMissedMoves(aPkmn["id"], pkmn["moves"])
+    yield from addMissedMoves(aPkmn["id"], pkmn["moves"])
     pkmn["stats"] = getStats(aPkmn["stats"])
     pkmn["types"] = getTypes(aPkmn["types"])
-    pkmn["evolutions"] = getEvolutions(aSpcs["evolution_chain"])
+    pkmn["evolutions"] = yield from getEvolutions(aSpcs["evolution_chain"])
     pkmn["baby"] = aSpcs["is_baby"]
     pkmn["legendary"] = aSpcs["is_legendary"]
     pkmn["mythical"] = aSpcs["is_mythical"]
@@ -107,15 +140,15 @@ def getPokemon(aPkmn: PAPokemon):
 def getName(raw: NamedResource):
     return raw["name"]
 
-def getIDAndName(rawID: int, aVarieties: PAVarieties, aForms: PAForms, aNames: PANames):
+def getIDAndName(rawID: int, aVarieties: PAVarieties, aForms: PAForms, aNames: PANames) -> Fetching[tuple[int, str, bool]]:
     baseID = rawID
     for variety in aVarieties:
         if variety["is_default"]:
-            defaultPokemon = json.loads(requests.get(variety["pokemon"]["url"]).text)
+            defaultPokemon = yield from fetchJSON(variety["pokemon"]["url"])
             if rawID != defaultPokemon["id"]:
                 baseID = defaultPokemon["id"]
     for resource in aForms:
-        form: PAForm = json.loads(requests.get(resource["url"]).text)
+        form: PAForm = yield from fetchJSON(resource["url"])
         if form["is_default"]:
             name = getNameFromLangs(form["names"])
             if not name:
@@ -182,17 +215,15 @@ def _addMovesFromPDB(moveSoup: BeautifulSoup, versionText: str, checkText: str,
             number = int(tr.find("td", class_="cell-num").getText())
         moves[moveName].append((versionText, dexText, number))
     
-def addMissedMoves(pkid: int, existingMoves: RawMoves):
-    r = requests.get(f"https://pokemondb.net/pokedex/{pkid}/moves/8")
-    soup = BeautifulSoup(r.text, "html.parser")
+def addMissedMoves(pkid: int, existingMoves: RawMoves) -> Fetching[None]:
+    soup = BeautifulSoup((yield from fetchPage(f"{POKEMONDB_URL}/pokedex/{pkid}/moves/8")), "html.parser")
     moves: RawMoves = {}
     _addMovesFromPDB(soup, "sword-shield", "learns the following moves in Pokémon Sword & Shield", "level-up", moves, includeNumber=True)
     _addMovesFromPDB(soup, "sword-shield", "is compatible with these Technical Machines in Pokémon Sword & Shield", "machine", moves)
     _addMovesFromPDB(soup, "sword-shield", "is compatible with these Technical Records in Pokémon Sword & Shield", "record", moves)
     _addMovesFromPDB(soup, "sword-shield", "learns the following moves via breeding in Pokémon Sword & Shield", "egg", moves)
     _addMovesFromPDB(soup, "sword-shield", "can be taught these attacks in Pokémon Sword & Shield", "tutor", moves)
-    r = requests.get(f"https://pokemondb.net/pokedex/{pkid}/moves/7")
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = BeautifulSoup((yield from fetchPage(f"{POKEMONDB_URL}/pokedex/{pkid}/moves/7")), "html.parser")
     _addMovesFromPDB(soup, "ultra-sun-ultra-moon", "can be taught these attacks in Pokémon Ultra Sun & Ultra Moon", "tutor", moves)
     _addMovesFromPDB(soup, "ultra-sun-ultra-moon", "can only learn these moves in previous generations", "transfer", moves)
     _addMovesFromPDB(soup, "ultra-sun-ultra-moon", "learns the following moves via breeding in Pokémon Ultra Sun & Ultra Moon", "egg", moves)
@@ -217,15 +248,15 @@ def getStats(aStats: PAStats):
         stats[getName(rawStat["stat"])] = (rawStat["base_stat"], rawStat["effort"])
     return stats
 
-def getEvolutions(aLink: NamedResource):
-    a: PAEvolutionChain = json.loads(requests.get(aLink["url"]).text)
+def getEvolutions(aLink: NamedResource) -> Fetching[RawEvolutions]:
+    a: PAEvolutionChain = yield from fetchJSON(aLink["url"])
     evolutions: RawEvolutions = []
-    toCheck = [a["chain"]]
+    toCheck: list[tuple[_PAChainLink, Optional[str]]] = [(a["chain"], None)]
     while len(toCheck):
-        current = toCheck.pop()
+        current, parent = toCheck.pop()
         evoName, details, toAdd = _getEvolutions(current)
-        evolutions.append((evoName, details))
-        toCheck += toAdd
+        evolutions.append((evoName, details, parent))
+        toCheck += [(link, evoName) for link in toAdd]
     return evolutions
 
 def _getEvolutions(current: _PAChainLink):
@@ -304,8 +335,7 @@ def _getNumForTD(d: bs4.Tag) -> tuple[Union[int, None], bs4.Tag]:
 
 suburlPat = re.compile(r"move\/(.+)$")
 def addGen8MovesToDex(movedex: dict[str, str]):
-    r = requests.get(f"https://pokemondb.net/move/generation/8")
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = BeautifulSoup(fetchText(f"{POKEMONDB_URL}/move/generation/8"), "html.parser")
     
     table: bs4.Tag = soup.find("table", id="moves", class_="data-table")
     tr: bs4.Tag
@@ -361,7 +391,7 @@ RawAbility = dict[str, Union[
 def getAbility(aAbility: PAAbility):
     ability: RawAbility = {}
 
-    ability["name"] = getIDAndName(aAbility["names"])
+    ability["name"] = getNameFromLangs(aAbility["names"])
     ability["effect"] = getEffect(aAbility["effect_entries"])
     ability["gen"] = getName(aAbility["generation"])
 
@@ -382,22 +412,364 @@ def pretty(d, indent=0):
         else:
             print('\t' * (indent+1) + str(value))
 
-def getDex(url: str, func: Callable[[int], dict[str, dict]]):
-    resources = json.loads(requests.get(url).text)["results"]
-    dex = {}
-    for resource in resources:
-        dex[getName(resource)] = get(resource["url"], func)
-    return dex
+def fetchText(url: str) -> str:
+    if HTTP_CACHE:
+        return decodeText(*HTTP_CACHE.get(url))
+    _, body, headers = request(url)
+    return decodeText(body, headers)
+
+def decodeText(body: bytes, headers) -> str:
+    """ Decodes a response body the same way `requests` does, so that pages fetched either way parse the same. """
+
+    encoding = requests.utils.get_encoding_from_headers(headers)
+    if encoding is None:
+        encoding = requests.compat.chardet.detect(body)["encoding"] if requests.compat.chardet else "utf-8"
+    try:
+        return str(body, encoding, errors="replace")
+    except (LookupError, TypeError):
+        return str(body, errors="replace")
+
+kindPat = re.compile(r"/\d+")
+def getKind(url: str):
+    """ The kind of resource at `url`, like `/api/v2/pokemon-species/N/`. """
+
+    return kindPat.sub("/N", re.sub(r"^\w+://[^/]+", "", url))
+
+def getSize(page: Any) -> int:
+    """ Roughly how many bytes `page` takes in memory, along with everything in it. """
+
+    size = sys.getsizeof(page)
+    if isinstance(page, dict):
+        size += sum(getSize(key) + getSize(value) for key, value in page.items())
+    elif isinstance(page, list):
+        size += sum(getSize(value) for value in page)
+    return size
+
+class PageMemo:
+    """ Every page fetched during one run, kept by URL, so that a page several items need is only fetched once.
+        A page is kept as text until it's first asked for parsed, and only parsed that once, so that a page fetched to check it for changes
+        can still be parsed when an item is built from it. A page that's still being fetched for one item is waited on by any other item that needs it.
+        Past `maxBytes` of pages, counted as they're kept, text or parsed, the least recently used pages are dropped,
+        so that a whole Pokedex's worth isn't kept. """
+
+    def __init__(self, maxBytes: Optional[int]=256 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        # Each page, with how it was parsed, if it has been.
+        self.pages: OrderedDict[str, tuple[Any, Optional[Callable[[str], Any]], int]] = OrderedDict()
+        self.size = 0
+        self.inFlight: dict[str, asyncio.Task] = {}
+        self.requests: Counter[str] = Counter()
+        self.hits: Counter[str] = Counter()
+        self.joins: Counter[str] = Counter()
+        self.evictions = 0
+        # Kept for every page, even once it's dropped, for the manifest of each item built from it.
+        self.digests: dict[str, str] = {}
+    
+    def lookup(self, url: str, parse: Optional[Callable[[str], Any]]):
+        """ Counts a request for `url`, and returns whether its page is already here in a form `parse` can be given. """
+
+        kind = getKind(url)
+        self.requests[kind] += 1
+        if url in self.pages and self.pages[url][1] in (None, parse):
+            self.hits[kind] += 1
+            self.pages.move_to_end(url)
+            return True
+        return False
+    
+    def use(self, url: str, text: str, parse: Optional[Callable[[str], Any]]):
+        """ The page at `url` parsed with `parse`, parsing its `text` if it hasn't been yet. """
+
+        if not url in self.pages:
+            return parse(text) if parse else text
+        page, parsedWith, size = self.pages[url]
+        if parse and not parsedWith:
+            page = parse(page)
+            parsedSize = getSize(page)
+            self.pages[url] = (page, parse, parsedSize)
+            self.size += parsedSize - size
+            self.shrink()
+        return page
+    
+    def store(self, url: str, text: str):
+        self.digests[url] = getDigest(text)
+        if url in self.pages:
+            self.size -= self.pages.pop(url)[2]
+        size = getSize(text)
+        self.pages[url] = (text, None, size)
+        self.size += size
+        self.shrink()
+        return text
+    
+    def shrink(self):
+        while self.maxBytes is not None and self.size > self.maxBytes and len(self.pages) > 1:
+            _, (_, _, size) = self.pages.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+    
+    def retain(self, urls: set[str]):
+        """ Drops every page that isn't in `urls`. """
+
+        for url in [url for url in self.pages if not url in urls]:
+            self.size -= self.pages.pop(url)[2]
+    
+    def get(self, url: str, parse: Optional[Callable[[str], Any]], fetch: Callable[[str], str]=fetchText):
+        text = None if self.lookup(url, parse) else self.store(url, fetch(url))
+        return self.use(url, text, parse)
+    
+    async def getAsync(self, url: str, parse: Optional[Callable[[str], Any]], fetch: Callable[[str], Awaitable[str]]):
+        if self.lookup(url, parse):
+            return self.use(url, None, parse)
+        if url in self.inFlight:
+            self.joins[getKind(url)] += 1
+        else:
+            self.inFlight[url] = asyncio.ensure_future(self.load(url, fetch))
+        # The page can be dropped by the time this gets to it, so it's parsed from the text it came as if it has to be.
+        return self.use(url, await self.inFlight[url], parse)
+    
+    async def load(self, url: str, fetch: Callable[[str], Awaitable[str]]):
+        try:
+            return self.store(url, await fetch(url))
+        finally:
+            del self.inFlight[url]
+    
+    def getPageDigest(self, url: str, fetch: Callable[[str], str]=fetchText):
+        """ The digest of the page at `url`, which is kept in case an item is rebuilt from it. """
+
+        self.get(url, None, fetch)
+        return self.digests[url]
+    
+    def report(self):
+        requests = sum(self.requests.values())
+        reused = sum(self.hits.values()) + sum(self.joins.values())
+        lines = [f"Fetched {requests - reused} pages for {requests} requests, {round(reused / max(requests, 1) * 100, 1)}% from the memo ({self.evictions} dropped)"]
+        for kind, count in self.requests.most_common():
+            kindReused = self.hits[kind] + self.joins[kind]
+            lines.append(f"  {kind}: {count} requests, {kindReused} from the memo ({round(kindReused / count * 100, 1)}%), {self.joins[kind]} of them while in flight")
+        return "\n".join(lines)
+
+def getItem(url: str, func: Callable[[dict], Union[dict, Fetching[dict]]]) -> Fetching[dict]:
+    item = func((yield from fetchJSON(url)))
+    if inspect.isgenerator(item):
+        item = yield from item
+    return item
+
+def recordURLs(fetching: Fetching[T], urls: list[str]) -> Fetching[T]:
+    """ Passes on every page a builder asks for, noting down its URL. """
+
+    try:
+        request = next(fetching)
+        while True:
+            urls.append(request[0])
+            request = fetching.send((yield request))
+    except StopIteration as stop:
+        return stop.value
+
+def run(fetching: Fetching[T], pages: PageMemo) -> T:
+    """ Runs a builder to the end, fetching each page it asks for one at a time. """
+
+    try:
+        url, parse = next(fetching)
+        while True:
+            url, parse = fetching.send(pages.get(url, parse))
+    except StopIteration as stop:
+        return stop.value
+
+async def runAsync(fetching: Fetching[T], pages: PageMemo, fetch: Callable[[str], Awaitable[str]]) -> T:
+    try:
+        url, parse = next(fetching)
+        while True:
+            url, parse = fetching.send(await pages.getAsync(url, parse, fetch))
+    except StopIteration as stop:
+        return stop.value
+
+# Alongside each dex, a manifest keeps the URL of every entry and the digest of every page it was built from,
+#  so that a later rebuild can tell which entries are out of date.
+Manifest = dict[str, dict[str, Union[str, dict[str, str]]]]
+
+def getManifestPath(fileName: str):
+    return os.path.splitext(fileName)[0] + ".pages.json"
+
+def getReportPath(fileName: str):
+    return os.path.splitext(fileName)[0] + ".changes.json"
+
+def getJournalPath(fileName: str):
+    return os.path.splitext(fileName)[0] + ".journal.jsonl"
+
+def readDex(fileName: str) -> tuple[dict[str, dict], Manifest]:
+    """ The dex in `fileName` and its manifest. Either one is empty if it can't be read. """
+
+    try:
+        with open(fileName, "r") as f:
+            dex = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    try:
+        with open(getManifestPath(fileName), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    return dex, manifest
+
+class DexChanges:
+    """ What it takes to bring a dex up to date with its listing: build the entries that are new, drop the ones that are gone,
+        and rebuild the ones built from a page that's changed since. Entries the manifest doesn't know about are rebuilt too. """
+
+    def __init__(self, resources: list[NamedResource], dex: dict[str, dict], manifest: Manifest):
+        self.dex = dex
+        self.manifest = manifest
+        self.urls = {getName(resource): resource["url"] for resource in resources}
+        self.added = [name for name in self.urls if not name in dex]
+        self.removed = [name for name in dex if not name in self.urls]
+        # An entry can only be checked if it was built from the URL the listing has for it now.
+        self.unknown = [name for name in self.urls if name in dex and manifest.get(name, {}).get("url") != self.urls[name]]
+        unknown = set(self.unknown)
+        self.checked = [name for name in self.urls if name in dex and not name in unknown]
+        self.stale: list[str] = []
+        self.changedPages: list[str] = []
+        self.changed: list[str] = []
+    
+    def getPagesToCheck(self):
+        """ Every page the entries being checked were built from, once each. """
+
+        return list(dict.fromkeys(url for name in self.checked for url in self.manifest[name]["pages"]))
+    
+    def compare(self, digests: dict[str, str]):
+        """ Finds the entries built from a page whose digest isn't the same as it is in `digests` now. """
+
+        changedPages: dict[str, None] = {}
+        for name in self.checked:
+            changed = [url for url, digest in self.manifest[name]["pages"].items() if digests[url] != digest]
+            if changed:
+                self.stale.append(name)
+                changedPages.update(dict.fromkeys(changed))
+        self.changedPages = list(changedPages)
+    
+    def getPagesToReuse(self):
+        """ Every page that was checked and that a stale entry will be rebuilt from. """
+
+        return {url for name in self.stale for url in self.manifest[name]["pages"]}
+    
+    def getToBuild(self):
+        toBuild = set(self.added) | set(self.unknown) | set(self.stale)
+        return [name for name in self.urls if name in toBuild]
+    
+    def write(self, f, journal: Journal) -> Manifest:
+        """ Writes the dex to `f` in listing order, with the entries that were built read back from the `journal` one at a time
+            and every other entry kept as it was. The file is the same as `json.dump` would write for the whole dex. Returns the dex's manifest. """
+
+        toBuild = set(self.getToBuild())
+        manifest: Manifest = {}
+        self.changed = []
+        f.write("{")
+        for i, (name, url) in enumerate(self.urls.items()):
+            if name in toBuild:
+                item = journal.getItem(name)
+                manifest[name] = {"url": url, "pages": journal.getPages(name)}
+                # A changed page doesn't always change the entry built from it.
+                if name in self.dex and json.dumps(item) != json.dumps(self.dex[name]):
+                    self.changed.append(name)
+            else:
+                item = self.dex[name]
+                manifest[name] = self.manifest[name]
+            if i:
+                f.write(", ")
+            f.write(f"{json.dumps(name)}: {json.dumps(item)}")
+        f.write("}")
+        return manifest
+    
+    def getReport(self):
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "rebuilt": [name for name in self.getToBuild() if name in self.dex],
+            "kept": len(self.checked) - len(self.stale),
+            "changedPages": self.changedPages
+        }
+    
+    def summarize(self):
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed "
+            f"({len(self.stale) + len(self.unknown)} rebuilt, {len(self.checked) - len(self.stale)} kept as they were); "
+            f"{len(self.changedPages)} of {len(self.getPagesToCheck())} pages checked had changed")
+
+def getDigest(text: str):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def getEntry(url: str, func: Callable[[dict], Union[dict, Fetching[dict]]], pages: PageMemo):
+    """ Builds the item at `url`, along with the digest of every page it was built from. """
 
-def get(url: str, func: Callable[[dict], dict]):
     print(url, end="... ", flush=True)
     tic = time.perf_counter()
-    data = requests.get(url).text
-    obj = json.loads(data)
-    item = func(obj)
+    urls: list[str] = []
+    item = run(recordURLs(getItem(url, func), urls), pages)
     toc = time.perf_counter()
     print(f"Got {getName(item)} in {round(toc - tic, 2)}s")
-    return item
+    return item, {pageURL: pages.digests[pageURL] for pageURL in urls}
+
+def getDex(url: str, func: Callable[[dict], Union[dict, Fetching[dict]]], pages: PageMemo, dex: dict[str, dict], manifest: Manifest, journal: Journal):
+    resources = json.loads(fetchText(url))["results"]
+    changes = DexChanges(resources, dex, manifest)
+    changes.compare({pageURL: pages.getPageDigest(pageURL) for pageURL in changes.getPagesToCheck()})
+    pages.retain(changes.getPagesToReuse())
+    for name in changes.getToBuild():
+        if journal.has(name, changes.urls[name]): continue
+        journal.add(name, changes.urls[name], *getEntry(changes.urls[name], func, pages))
+    return changes
+
+def get(url: str, func: Callable[[dict], Union[dict, Fetching[dict]]]):
+    return getEntry(url, func, PageMemo())[0]
+
+class Scraper:
+    """ Builds many items at once over one pooled session, with at most `concurrency` requests in flight.
+        Each item is built by its own worker one page at a time, so only `concurrency` items are ever half built. """
+
+    def __init__(self, session: aiohttp.ClientSession, concurrency: int, pages: PageMemo):
+        self.session = session
+        self.concurrency = concurrency
+        self.pages = pages
+    
+    async def fetch(self, url: str):
+        if HTTP_CACHE:
+            return decodeText(*await HTTP_CACHE.getAsync(self.session, url))
+        _, body, headers = await requestAsync(self.session, url)
+        return decodeText(body, headers)
+    
+    async def fetchDigest(self, url: str):
+        await self.pages.getAsync(url, None, self.fetch)
+        return self.pages.digests[url]
+    
+    async def getEntry(self, url: str, func: Callable[[dict], Union[dict, Fetching[dict]]]):
+        tic = time.perf_counter()
+        urls: list[str] = []
+        item = await runAsync(recordURLs(getItem(url, func), urls), self.pages, self.fetch)
+        toc = time.perf_counter()
+        print(f"{url}... Got {getName(item)} in {round(toc - tic, 2)}s", flush=True)
+        return item, {pageURL: self.pages.digests[pageURL] for pageURL in urls}
+    
+    async def map(self, func: Callable[[str], Awaitable[T]], keys: list[str]) -> list[T]:
+        """ Runs `func` for every key, returning the results in the same order as the keys. """
+
+        results: list[Optional[T]] = [None] * len(keys)
+        pending = iter(range(len(keys)))
+        async def work():
+            for i in pending:
+                results[i] = await func(keys[i])
+        await asyncio.gather(*(work() for _ in range(min(self.concurrency, len(keys)) or 1)))
+        return results
+
+async def getDexAsync(url: str, func: Callable[[dict], Union[dict, Fetching[dict]]], concurrency: int, pages: PageMemo, dex: dict[str, dict], manifest: Manifest, journal: Journal):
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        scraper = Scraper(session, concurrency, pages)
+        resources = json.loads(await scraper.fetch(url))["results"]
+        changes = DexChanges(resources, dex, manifest)
+        toCheck = changes.getPagesToCheck()
+        changes.compare(dict(zip(toCheck, await scraper.map(scraper.fetchDigest, toCheck))))
+        pages.retain(changes.getPagesToReuse())
+        # Entries are journaled as they finish, instead of kept until every entry is done.
+        async def build(name: str):
+            journal.add(name, changes.urls[name], *await scraper.getEntry(changes.urls[name], func))
+        await scraper.map(build, [name for name in changes.getToBuild() if not journal.has(name, changes.urls[name])])
+    return changes
 
 def editFile(fileName: str):
     try:
@@ -405,30 +777,81 @@ def editFile(fileName: str):
     except FileExistsError:
         return open(fileName, "w")
 
-def createNewDex(fileName: str, apiName: str, func: Callable[[dict], dict]):
+def replaceFile(fileName: str, write: Callable[[Any], T]) -> T:
+    """ Writes a file next to `fileName` with `write`, then moves it over `fileName`, so that a crash never leaves it half written. """
+
+    tmpFileName = fileName + ".tmp"
+    with open(tmpFileName, "w") as f:
+        result = write(f)
+    os.replace(tmpFileName, fileName)
+    return result
+
+def createNewDex(fileName: str, apiName: str, func: Callable[[dict], Union[dict, Fetching[dict]]], concurrency: int=0, incremental: bool=False):
+    """ Scrapes every item in one of PokeAPI's listings into a dex file, with its manifest and a report of what changed next to it.
+        With a `concurrency`, up to that many requests are in flight at once instead of one at a time. The file is the same either way.
+        With `incremental`, the dex already in the file is brought up to date instead, and only new entries and entries whose pages changed are scraped.
+        Telling which pages changed still means asking for every one of them, so without the HTTP cache an incremental run downloads as much as a full one.
+        Each entry is journaled as soon as it's built. If a run stops partway, the next one picks up from its journal, which is removed once the dex is written. """
+
     tic = time.perf_counter()
+    if HTTP_CACHE:
+        HTTP_CACHE.resetCounts()
+    elif incremental:
+        print("The HTTP cache is off, so every page will be downloaded again to check it for changes")
     arbitrarilyLargeNumber = 1000000
-    dex = getDex(f"https://pokeapi.co/api/v2/{apiName}?limit={arbitrarilyLargeNumber}", func)
-    with editFile(fileName) as f:
-        json.dump(dex, f)
+    url = f"{POKEAPI_URL}/{apiName}?limit={arbitrarilyLargeNumber}"
+    dex, manifest = readDex(fileName) if incremental else ({}, {})
+    # Shared by every item, so that a page like an evolution chain is only fetched for the first member of the family.
+    pages = PageMemo()
+    journal = Journal(getJournalPath(fileName))
+    if len(journal):
+        print(f"Resuming from {len(journal)} entries in {journal.path}")
+    try:
+        if concurrency:
+            changes = asyncio.run(getDexAsync(url, func, concurrency, pages, dex, manifest, journal))
+        else:
+            changes = getDex(url, func, pages, dex, manifest, journal)
+        manifest = replaceFile(fileName, lambda f: changes.write(f, journal))
+    finally:
+        journal.close()
+    replaceFile(getManifestPath(fileName), lambda f: json.dump(manifest, f))
+    with editFile(getReportPath(fileName)) as f:
+        json.dump(changes.getReport(), f, indent=4)
+    journal.remove()
     toc = time.perf_counter()
     print(f"Built dex for {apiName} in {round((toc - tic)/60, 2)}m")
+    print(changes.summarize())
+    print(pages.report())
+    if HTTP_CACHE:
+        print(HTTP_CACHE.report())
 
 def completeMovedex(movedexSource: str, writeSource: Optional[str]):
     """ This doesn't need to be here, pokemondb is stupid and decided to spell "Vice Grip" as "Vise Grip". """
     if not writeSource: writeSource = movedexSource
+    if HTTP_CACHE:
+        HTTP_CACHE.resetCounts()
     with open(movedexSource, "r") as f:
         movedex = json.load(f)
     addGen8MovesToDex(movedex)
     with editFile(writeSource) as f:
         json.dump(movedex, f)
+    if HTTP_CACHE:
+        print(HTTP_CACHE.report())
 
-def createNew(apiName: str, itemName: str, func: Callable[[dict], dict]):
-    item = get(f"https://pokeapi.co/api/v2/{apiName}/{itemName}", func)
+def createNew(apiName: str, itemName: str, func: Callable[[dict], Union[dict, Fetching[dict]]]):
+    item = get(f"{POKEAPI_URL}/{apiName}/{itemName}", func)
     return item
 
+def getScrapeConcurrency():
+    """ How many requests to have in flight at once, from MUOS_SCRAPE_CONCURRENCY. 0 makes them one at a time. """
+
+    value = os.getenv("MUOS_SCRAPE_CONCURRENCY", "8")
+    if not value.strip().isdigit():
+        raise ValueError(f"MUOS_SCRAPE_CONCURRENCY must be a number of requests, or 0 for one at a time, not {value!r}")
+    return int(value)
+
 def main():
-    createNewDex("./pokedex.json", "pokemon", getPokemon)
+    createNewDex("./pokedex.json", "pokemon", getPokemon, getScrapeConcurrency(), incremental=True)
     #createNewDex("./movedex.json", "move", getMove)
     #completeMovedex("./sources/dexes/movedex.json", "./movedex.json")
     #createNewDex("./abilitydex.json", "ability", getAbility)
@@ -0,0 +1,452 @@
+import heapq
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Generic, Optional, TypeVar, Union
+
+import numpy as np
+
+import back.bitmap as bitmap
+from back.columns import toBitmap, toMask
+from back.Dexes import Dex, DexItem
+from back.utils import Fail
+from sources.text import DEX as D
+
+M = TypeVar("M", bound="DexItem")
+
+# Queries look like `[modifiers] <mode> [with <expression>]`, where the expression is made of clauses like `moves tackle`
+#  joined by `and`, `or`, `not`, commas and parentheses. `not` binds tightest, then `and`, then `or`.
+# A clause without a qualifier reuses the last one, so `moves tackle, tri attack` searches for both moves.
+# Commas take the operator used alongside them, and default to `and`.
+# Numeric qualifiers compare against numbers, like `speed > 100` or `bst between 500 and 600`.
+# Level-up learnsets can be searched by level, like `learn thunderbolt by level 30` or `pokemon gardevoir between 20 and 40`.
+# Text in double quotes is kept together, like `effect "raises speed"`, and results matched by text are ranked by relevance.
+# `at least N of (<clauses>)` matches items that match at least N of the comma-separated clauses in the group.
+# Results can be ordered with a trailing `sort by <key> [asc|desc] [limit N]`.
+
+tokenPat = re.compile(r"\"[^\"]*\"?|\(|\)|,|[<>!]=|[<>=]|[^\s(),<>!=]+")
+spacePat = re.compile(r"\s+")
+atLeastPat = re.compile(r"at least (\d+) of")
+orderPat = re.compile(r"(?:^|\s+)sort by (\S+)(?: (asc|desc))?(?: limit (\d+))?$")
+OPERATORS = {"and", "or", "not", "(", ")", ","}
+
+class Node(ABC, Generic[M]):
+    @abstractmethod
+    def estimate(self, dex: Dex[M]) -> int:
+        """ An upper bound on how many items this node can match, used to decide what to evaluate first. """
+
+    @abstractmethod
+    def evaluate(self, dex: Dex[M], candidates: int) -> int:
+        """ Returns the bitmap of the items in `candidates` that match this node. """
+
+    def plan(self, dex: Dex[M]):
+        pass
+
+    def getScores(self, dex: Dex[M]) -> Optional[np.ndarray]:
+        """ How relevant every item in the dex is to this node, if it matches by relevance at all. """
+        return None
+
+def sumScores(dex: Dex[M], children: list[Node[M]]) -> Optional[np.ndarray]:
+    scores = [score for score in (child.getScores(dex) for child in children) if score is not None]
+    return sum(scores) if scores else None
+
+class Clause(Node[M]):
+    def __init__(self, qualifier: Any, target: Any):
+        self.qualifier = qualifier
+        # Whatever the qualifier parsed out of the words after it.
+        self.target = target
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.qualifier.getName()} {self.target}>"
+
+    def estimate(self, dex: Dex[M]):
+        return self.qualifier.estimate(dex, self.target)
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        return self.qualifier.getBitmap(dex, self.target, candidates)
+
+    def getScores(self, dex: Dex[M]):
+        return self.qualifier.getScores(dex, self.target)
+
+class ModifierClause(Node[M]):
+    def __init__(self, modifier: Any):
+        self.modifier = modifier
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.modifier.getName()}>"
+
+    def estimate(self, dex: Dex[M]):
+        return bitmap.count(self.modifier.getBitmap(dex) & dex.getUniverse())
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        return self.modifier.getBitmap(dex) & candidates
+
+class Not(Node[M]):
+    def __init__(self, child: Node[M]):
+        self.child = child
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.child}>"
+
+    def estimate(self, dex: Dex[M]):
+        return len(dex.getAllNames())
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        return candidates & ~self.child.evaluate(dex, candidates)
+
+    def plan(self, dex: Dex[M]):
+        self.child.plan(dex)
+
+class And(Node[M]):
+    def __init__(self, children: list[Node[M]]):
+        self.children = children
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.children}>"
+
+    def estimate(self, dex: Dex[M]):
+        return min(child.estimate(dex) for child in self.children)
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        # Each child only has to test what the children before it let through.
+        for child in self.children:
+            candidates = child.evaluate(dex, candidates)
+            if not candidates:
+                break
+        return candidates
+
+    def plan(self, dex: Dex[M]):
+        for child in self.children:
+            child.plan(dex)
+        # The most selective children go first so that the rest have the fewest candidates to test.
+        self.children.sort(key=lambda child: child.estimate(dex))
+
+    def getScores(self, dex: Dex[M]):
+        return sumScores(dex, self.children)
+
+class Or(Node[M]):
+    def __init__(self, children: list[Node[M]]):
+        self.children = children
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.children}>"
+
+    def estimate(self, dex: Dex[M]):
+        return min(sum(child.estimate(dex) for child in self.children), len(dex.getAllNames()))
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        # Items that already matched one child don't have to be tested against the others.
+        matches = 0
+        for child in self.children:
+            found = child.evaluate(dex, candidates)
+            matches |= found
+            candidates &= ~found
+            if not candidates:
+                break
+        return matches
+
+    def plan(self, dex: Dex[M]):
+        for child in self.children:
+            child.plan(dex)
+        # The least selective children go first so that they remove the most candidates from the rest.
+        self.children.sort(key=lambda child: child.estimate(dex), reverse=True)
+
+    def getScores(self, dex: Dex[M]):
+        return sumScores(dex, self.children)
+
+class AtLeast(Node[M]):
+    def __init__(self, count: int, children: list[Node[M]]):
+        self.count = count
+        self.children = children
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.count} {self.children}>"
+
+    def estimate(self, dex: Dex[M]):
+        return min(sum(child.estimate(dex) for child in self.children), len(dex.getAllNames()))
+
+    def evaluate(self, dex: Dex[M], candidates: int):
+        if self.count > len(self.children):
+            return 0
+        # Each child's matches are counted for every item at once instead of testing the items one at a time.
+        counts = np.zeros(dex.getSize(), dtype=np.int32)
+        for child in self.children:
+            counts += toMask(child.evaluate(dex, candidates), dex.getSize())
+        return toBitmap(counts >= self.count) & candidates
+
+    def plan(self, dex: Dex[M]):
+        for child in self.children:
+            child.plan(dex)
+
+    def getScores(self, dex: Dex[M]):
+        return sumScores(dex, self.children)
+
+class Parser:
+    def __init__(self, mode: Any, expression: str, query: str):
+        self.mode = mode
+        self.tokens: list[str] = tokenPat.findall(expression)
+        self.pos = 0
+        self.query = query
+        # The last qualifier seen, for clauses that don't name their own.
+        self.qualifier = None
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def fail(self):
+        raise Fail(D.ERR.BAD_SYNTAX(self.query, self.peek()))
+
+    def parse(self) -> Node:
+        node = self.parseOr(self.getCommaOp())
+        if self.peek() is not None:
+            self.fail()
+        return node
+
+    def getCommaOp(self):
+        """ Commas mean `or` in a group that only uses `or`, and `and` otherwise. """
+
+        depth = 0
+        ops = set()
+        for token in self.tokens[self.pos:]:
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                if not depth: break
+                depth -= 1
+            elif not depth and token in ["and", "or"]:
+                ops.add(token)
+        return "or" if ops == {"or"} else "and"
+
+    def parseOr(self, commaOp: str) -> Node:
+        children = [self.parseAnd(commaOp)]
+        while self.peek() == "or" or (self.peek() == "," and commaOp == "or"):
+            self.next()
+            children.append(self.parseAnd(commaOp))
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parseAnd(self, commaOp: str) -> Node:
+        children = [self.parseNot()]
+        while self.peek() == "and" or (self.peek() == "," and commaOp == "and"):
+            self.next()
+            children.append(self.parseNot())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parseNot(self) -> Node:
+        if self.peek() == "not":
+            self.next()
+            return Not(self.parseNot())
+        return self.parsePrimary()
+
+    def parsePrimary(self) -> Node:
+        if self.peek() == "(":
+            self.next()
+            node = self.parseOr(self.getCommaOp())
+            if self.next() != ")":
+                self.pos -= 1
+                self.fail()
+            return node
+        words: list[str] = []
+        between = False
+        while self.peek() is not None and not self.peek() in OPERATORS:
+            words.append(self.next())
+            # The `and` in `between 1 and 2` or `between level 20 and 40` is part of the clause.
+            if words[-1] == "between":
+                between = True
+            elif between and self.peek() == "and":
+                words.append(self.next())
+                between = False
+        if not words:
+            self.fail()
+        if words[:2] == ["at", "least"]:
+            atLeast = atLeastPat.fullmatch(" ".join(words))
+            if not atLeast or self.peek() != "(":
+                self.fail()
+            return self.parseAtLeast(int(atLeast.group(1)))
+        qualifier = self.mode.getQualifier(words[0])
+        if qualifier and len(words) > 1:
+            target = qualifier.parse(" ".join(words[1:]))
+            # Names can start with a qualifier, like `defense curl` in `moves tackle, defense curl`.
+            # If the rest doesn't make sense for that qualifier, the whole phrase belongs to the last one.
+            if target is not None or not self.qualifier:
+                self.qualifier = qualifier
+                if target is None:
+                    raise Fail(D.ERR.BAD_RANGE(self.query, " ".join(words[1:]), qualifier.getName()))
+                return Clause(qualifier, target)
+        elif qualifier:
+            self.qualifier = qualifier
+            # A qualifier can apply to a whole group, like `moves (tackle or tri attack)`.
+            if self.peek() == "(":
+                return self.parsePrimary()
+            self.fail()
+        elif len(words) == 1 and self.mode.getModifier(words[0]):
+            return ModifierClause(self.mode.getModifier(words[0]))
+        if not self.qualifier:
+            raise Fail(D.ERR.NO_EXTRA_MODE(self.query, " ".join(words)))
+        target = self.qualifier.parse(" ".join(words))
+        if target is None:
+            raise Fail(D.ERR.BAD_RANGE(self.query, " ".join(words), self.qualifier.getName()))
+        return Clause(self.qualifier, target)
+
+    def parseAtLeast(self, count: int) -> Node:
+        """ Parses the group after `at least N of`, where each clause is separated by a comma or `or`. """
+
+        self.next()
+        # Commas separate the clauses here, so `and` is the only operator a clause can use.
+        children = [self.parseAnd("or")]
+        while self.peek() in [",", "or"]:
+            self.next()
+            children.append(self.parseAnd("or"))
+        if self.next() != ")":
+            self.pos -= 1
+            self.fail()
+        return AtLeast(count, children)
+
+class Order(Generic[M]):
+    """ How to order the results of a query: by display name, or by one of the dex's numeric columns. """
+
+    def __init__(self, key: str, column: Optional[str], descending: bool, limit: Optional[int]):
+        self.key = key
+        self.column = column
+        self.descending = descending
+        self.limit = limit
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.key}{' desc' if self.descending else ''}{f' limit {self.limit}' if self.limit is not None else ''}>"
+
+    def getLimit(self):
+        return self.limit
+
+    def apply(self, dex: Dex[M], bits: int) -> list[int]:
+        """ Returns the IDs of the items in `bits` in order, without looking at any item past the limit. """
+
+        if self.column:
+            # Walking the column's presorted permutation and keeping the matches gives them in order without sorting them.
+            permutation = dex.getColumns().getOrder(self.column, self.descending)
+            ordered = permutation[toMask(bits, dex.getSize())[permutation]]
+            return ordered[:self.limit].tolist()
+        ids = bitmap.iterIDs(bits)
+        key = lambda i: (dex.getDispName(dex.getNameByID(i)) or "").lower()
+        if self.limit is None:
+            return sorted(ids, key=key, reverse=self.descending)
+        # A heap only ever holds the best `limit` names seen so far.
+        select = heapq.nlargest if self.descending else heapq.nsmallest
+        return select(self.limit, ids, key=key)
+
+class Query(Generic[M]):
+    """ A parsed and planned query, ready to be evaluated against its mode's dex any number of times. """
+
+    def __init__(self, mode: Any, modifiers: list[Any], expression: Optional[Node[M]], order: Optional[Order[M]]=None):
+        self.mode = mode
+        self.modifiers = modifiers
+        self.expression = expression
+        self.order = order
+        if self.expression:
+            self.expression.plan(self.mode.getDex())
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.mode.getName()} {self.modifiers} {self.expression}{f' {self.order}' if self.order else ''}>"
+
+    def getMode(self):
+        return self.mode
+
+    def getOrder(self):
+        return self.order
+
+    def evaluate(self):
+        """ Returns the bitmap of every item that matches the query. """
+
+        dex: Dex = self.mode.getDex()
+        candidates = dex.getUniverse()
+        if self.modifiers:
+            # Modifiers in the same group widen each other, then each group narrows everything else.
+            groups: dict[Any, int] = {}
+            for modifier in self.modifiers:
+                groups[modifier.getGroup()] = groups.get(modifier.getGroup(), 0) | modifier.getBitmap(dex)
+            for modified in groups.values():
+                candidates &= modified
+        elif not self.expression and not self.order:
+            return 0
+        if self.expression:
+            candidates = self.expression.evaluate(dex, candidates)
+        return candidates
+
+    def collect(self) -> Union[set[str], list[str]]:
+        """ Returns the name of every item that matches the query, as a list in order if the query asked for one and a set otherwise.
+            Nothing gets built, so that a list of matches only costs their display names. """
+
+        dex: Dex[M] = self.mode.getDex()
+        bits = self.evaluate()
+        if self.order:
+            return [dex.getNameByID(i) for i in self.order.apply(dex, bits)]
+        scores = self.expression.getScores(dex) if self.expression else None
+        if scores is None:
+            return {dex.getNameByID(i) for i in bitmap.iterIDs(bits)}
+        # Matches by text come back most relevant first.
+        ids = np.flatnonzero(toMask(bits, dex.getSize()))
+        return [dex.getNameByID(i) for i in ids[np.argsort(-scores[ids], kind="stable")].tolist()]
+
+def splitOrder(query: str):
+    """ Splits a trailing `sort by` off of a normalized query. """
+
+    match = orderPat.search(query)
+    if not match:
+        return query, None
+    return query[:match.start()], match
+
+def parseOrder(mode: Any, match: "re.Match[str]", query: str) -> Order:
+    key, direction, limit = match.groups()
+    column = None
+    if key != "name":
+        qualifier = mode.getQualifier(key)
+        column = qualifier.getColumn() if qualifier else None
+        if not column:
+            raise Fail(D.ERR.BAD_ORDER(query, key, ["name"] + [q.getName() for q in mode.getQualifiers() if q.getColumn()]))
+    return Order(key, column, direction == "desc", int(limit) if limit is not None else None)
+
+def compileQuery(mode: Any, modifierStrs: list[str], expression: str, query: str, order: Optional["re.Match[str]"]=None) -> Query:
+    modifiers = []
+    for modifierStr in modifierStrs:
+        modifier = mode.getModifier(modifierStr)
+        if not modifier:
+            raise Fail(D.ERR.BAD_MODIFIER(query, modifierStr, mode.getName(), [m.getName() for m in mode.getModifiers()]))
+        modifiers.append(modifier)
+    return Query(mode, modifiers, Parser(mode, expression, query).parse() if expression.strip() else None, parseOrder(mode, order, query) if order else None)
+
+def normalizeQuery(query: str):
+    return spacePat.sub(" ", query.strip().lower())
+
+class PlanCache:
+    """ A least-recently-used cache of compiled queries, keyed by their normalized text. """
+
+    def __init__(self, maxSize: int=256):
+        self.maxSize = maxSize
+        self.plans: OrderedDict[str, Query] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Query]:
+        plan = self.plans.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.plans.move_to_end(key)
+        return plan
+
+    def put(self, key: str, plan: Query):
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        if len(self.plans) > self.maxSize:
+            self.plans.popitem(last=False)
+
+    def clear(self):
+        self.plans.clear()
+
+    def report(self):
+        lookups = self.hits + self.misses
+        return f"Query plans: {self.hits} of {lookups} lookups hit ({round(self.hits / lookups * 100, 1) if lookups else 0}%), {len(self.plans)} cached"
@@ -0,0 +1,93 @@
+import numpy as np
+
+class SimilarityIndex:
+    """ Every item as a vector of numeric features scaled to [0, 1], followed by weighted one-hot categories,
+        so that the nearest neighbours of one item are a single matrix-vector product away. """
+
+    def __init__(self, features: np.ndarray, categories: list[tuple[np.ndarray, float]]):
+        features = np.asarray(features, dtype=np.float32)
+        span = features.max(axis=0) - features.min(axis=0)
+        scaled = (features - features.min(axis=0)) / np.where(span > 0, span, 1)
+        blocks = [scaled]
+        for oneHot, weight in categories:
+            # Each differing category value pushes two items apart by `weight` squared.
+            blocks.append(np.asarray(oneHot, dtype=np.float32) * weight)
+        self.vectors = np.hstack(blocks)
+        self.norms = (self.vectors ** 2).sum(axis=1)
+
+    def getDistances(self, i: int) -> np.ndarray:
+        """ The squared distance from item `i` to every item. """
+
+        return np.maximum(self.norms + self.norms[i] - 2 * (self.vectors @ self.vectors[i]), 0)
+
+    def search(self, i: int, k: int, candidates: np.ndarray) -> list[tuple[int, float]]:
+        """ The `k` items out of `candidates` that are closest to item `i`, closest first, along with their distances. """
+
+        distances = self.getDistances(i)
+        candidates = candidates.copy()
+        candidates[i] = False
+        ids = np.flatnonzero(candidates)
+        if not len(ids):
+            return []
+        k = min(k, len(ids))
+        nearest = ids[np.argpartition(distances[ids], k - 1)[:k]]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(int(j), float(np.sqrt(distances[j]))) for j in nearest]
+
+# A prime larger than any ID, for the universal hash functions the MinHash signatures are made from.
+_PRIME = (1 << 31) - 1
+
+class MinHashIndex:
+    """ MinHash signatures of a set of IDs for every item, banded into locality-sensitive hash buckets.
+        Items whose sets overlap a lot are likely to share a bucket in at least one band,
+        so the items similar to one are found by looking in its buckets instead of comparing it to every item. """
+
+    def __init__(self, sets: list[np.ndarray], numHashes: int=128, bands: int=32, seed: int=0):
+        self.bands = bands
+        self.rows = numHashes // bands
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, _PRIME, size=(numHashes, 1), dtype=np.int64)
+        b = rng.integers(0, _PRIME, size=(numHashes, 1), dtype=np.int64)
+        # Every ID is hashed once up front, so each signature is only a gather and a min.
+        size = max((int(ids.max()) + 1 for ids in sets if len(ids)), default=0)
+        hashes = (a * np.arange(size, dtype=np.int64) + b) % _PRIME
+        # Empty sets get a signature that can't collide with a real one's.
+        self.signatures = np.full((len(sets), numHashes), _PRIME, dtype=np.int64)
+        self.empty = np.array([not len(ids) for ids in sets], dtype=bool)
+        for i, ids in enumerate(sets):
+            if len(ids):
+                self.signatures[i] = hashes[:, ids].min(axis=1)
+        self.buckets: list[dict[bytes, list[int]]] = [{} for _ in range(bands)]
+        for i in np.flatnonzero(~self.empty):
+            for band, key in enumerate(self.getBandKeys(int(i))):
+                if not key in self.buckets[band]:
+                    self.buckets[band][key] = []
+                self.buckets[band][key].append(int(i))
+
+    def getBandKeys(self, i: int):
+        signature = self.signatures[i]
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def getCandidates(self, i: int) -> np.ndarray:
+        """ Every item that shares a bucket with item `i`. """
+
+        if self.empty[i]:
+            return np.zeros(0, dtype=np.int64)
+        found: set[int] = set()
+        for band, key in enumerate(self.getBandKeys(i)):
+            found.update(self.buckets[band].get(key, ()))
+        found.discard(i)
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def search(self, i: int, k: int, candidates: np.ndarray) -> list[tuple[int, float]]:
+        """ The `k` items out of `candidates` that share a bucket with item `i`, most similar first,
+            along with their estimated Jaccard similarity to it. """
+
+        ids = self.getCandidates(i)
+        ids = ids[candidates[ids]]
+        if not len(ids):
+            return []
+        # The fraction of matching signature values estimates how much of the two sets overlap.
+        estimates = (self.signatures[ids] == self.signatures[i]).mean(axis=1)
+        order = np.lexsort((ids, -estimates))[:k]
+        return [(int(ids[j]), float(estimates[j])) for j in order]
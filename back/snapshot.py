@@ -0,0 +1,77 @@
+import gc
+import hashlib
+import os
+import pickle
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, TypeVar
+
+_MAGIC = b"muOS-dex\n"
+
+T = TypeVar("T")
+
+@contextmanager
+def pausedGC():
+    """ Loading a dex allocates hundreds of thousands of objects that all survive, so the cyclic GC only wastes time rescanning them. """
+
+    wasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if wasEnabled:
+            gc.enable()
+
+def getSnapshotPath(source: str):
+    return os.path.splitext(source)[0] + ".snapshot"
+
+def getSourceStamp(source: str):
+    stat = os.stat(source)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def getCodeStamp(paths: list[str]):
+    """ A hash of the code in `paths`, so that a snapshot of what that code builds goes stale as soon as it's edited. """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def writeSnapshot(source: str, version: Any, obj: Any):
+    """ Pickles `obj` next to `source`, stamped with `version` and the source's size and mtime. """
+
+    path = getSnapshotPath(source)
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as f:
+        f.write(_MAGIC)
+        pickle.dump((version, getSourceStamp(source)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpPath, path)
+
+def readSnapshot(source: str, version: Any) -> Optional[Any]:
+    """ Returns the object in the snapshot for `source`, or None if there isn't a snapshot or it's stale. """
+
+    try:
+        with open(getSnapshotPath(source), "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+            if pickle.load(f) != (version, getSourceStamp(source)):
+                return None
+            data = f.read()
+        with pausedGC():
+            return pickle.loads(data)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+def loadSnapshot(source: str, version: Any, build: Callable[[], T]) -> T:
+    """ Loads `source` from its snapshot if it's fresh, otherwise builds it and writes a new snapshot. """
+
+    obj = readSnapshot(source, version)
+    if obj is not None:
+        return obj
+    obj = build()
+    try:
+        writeSnapshot(source, version, obj)
+    except OSError:
+        pass
+    return obj
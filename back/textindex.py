@@ -0,0 +1,78 @@
+import math
+import re
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Optional
+
+import numpy as np
+
+wordPat = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {"a", "an", "and", "be", "by", "for", "in", "is", "it", "its", "of", "on", "or", "the", "this", "that", "to", "will", "with"}
+# Each suffix is only stripped if it leaves a stem at least this long, so `speed` doesn't become `spe`.
+SUFFIXES = [("ing", 4), ("ed", 4), ("es", 3), ("s", 3), ("e", 3)]
+
+def stem(word: str):
+    """ Strips one common suffix so that `raise`, `raises`, `raised` and `raising` all become `rais`. """
+
+    for suffix, minStem in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= minStem:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text: Optional[str]):
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower()).replace("'", "").replace("’", "")
+    return [stem(word) for word in wordPat.findall(text) if not word in STOP_WORDS]
+
+class BM25Index:
+    """ An inverted index over a text for every item, ranked with Okapi BM25.
+        Each posting already holds its term's full contribution to an item's score, so a search is one pass over the postings of its terms. """
+
+    def __init__(self, texts: list[Optional[str]], k1: float=1.2, b: float=0.75, cacheSize: int=64):
+        self.size = len(texts)
+        counts = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(count.values()) for count in counts], dtype=np.float64)
+        avgLength = lengths.mean() if self.size and lengths.mean() else 1.0
+        found: dict[str, list[tuple[int, int]]] = {}
+        for i, count in enumerate(counts):
+            for term, tf in count.items():
+                if not term in found:
+                    found[term] = []
+                found[term].append((i, tf))
+        self.postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for term, hits in found.items():
+            ids = np.array([i for i, _ in hits], dtype=np.int64)
+            tfs = np.array([tf for _, tf in hits], dtype=np.float64)
+            idf = math.log(1 + (self.size - len(hits) + 0.5) / (len(hits) + 0.5))
+            self.postings[term] = (ids, idf * tfs * (k1 + 1) / (tfs + k1 * (1 - b + b * lengths[ids] / avgLength)))
+        self.cacheSize = cacheSize
+        self.cache: OrderedDict[frozenset[str], tuple[np.ndarray, np.ndarray]] = OrderedDict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cache"] = OrderedDict()
+        return state
+
+    def search(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """ Returns a mask of the items whose text has every term in `query`, and the BM25 score of each item (0 for those that don't match). """
+
+        terms = frozenset(tokenize(query))
+        if terms in self.cache:
+            self.cache.move_to_end(terms)
+            return self.cache[terms]
+        scores = np.zeros(self.size)
+        hits = np.zeros(self.size, dtype=np.int32)
+        for term in terms:
+            if not term in self.postings:
+                hits[:] = 0
+                break
+            ids, weights = self.postings[term]
+            scores[ids] += weights
+            hits[ids] += 1
+        matched = (hits == len(terms)) & (len(terms) > 0)
+        result = (matched, np.where(matched, scores, 0))
+        self.cache[terms] = result
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return result
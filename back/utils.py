@@ -45,24 +45,6 @@ def getRandomAvatarImageAndTime():
     with open(path[1], "rb") as im:
         return im.read()
 
-dashPat = re.compile(r"-")
-spacePat = re.compile(r"\s+")
-ePat = re.compile(r"e")
-def shuffleWord(word):
-    alphabet = "qwertyuiopasdfghjklzxcvbnm"
-    alphanum = "1234567890qwertyuiopasdfghjklzxcvbnm"
-    splits     = [(word[:i], word[i:]) for i in range(len(word) + 1)]
-    deletes    = [a + b[1:] for a, b in splits if b]
-    transposes = [a + b[1] + b[0] + b[2:] for a, b in splits if len(b)>1]
-    replaces   = [a + c + b[1:] for a, b in splits for c in alphabet if b]
-    inserts    = [a + c + b     for a, b in splits for c in alphabet]
-    shuffles = set(deletes + transposes + replaces + inserts)
-    for w in ["".join(let for let in shuffle if let in alphanum) for shuffle in shuffles]: shuffles.add(w)
-    for w in [re.sub(dashPat, " ", shuffle) for shuffle in shuffles]: shuffles.add(w)
-    for w in [re.sub(spacePat, "-", shuffle) for shuffle in shuffles]: shuffles.add(w)
-    for w in [re.sub(ePat, "\u00e9", shuffle) for shuffle in shuffles]: shuffles.add(w) # accented e (for flabebe)
-    return shuffles
-
 def getEmbed(*,
     title: str=None, description: str=None, fields: list[Union[tuple[str, str], tuple[str, str, bool]]]=None,
     image: str=None, footer=None, url=None, thumbnail=None, color=0xD67AE2, author=None,
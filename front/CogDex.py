@@ -2,10 +2,15 @@
 import re
 from typing import Any, Callable, Coroutine, Generic, Optional, Type, TypeVar, Union
 
-from back.Dexes import ABILITYDEX, MOVEDEX, POKEDEX, Ability, Dex, DexItem, LearnedMove, Move, Pokemon
-from back.utils import Fail, getMuOSEmbed, paginate, shuffleWord
+import numpy as np
+
+import back.bitmap as bitmap
+from back.Dexes import ABILITYDEX, MOVEDEX, NAMES, POKEDEX, Ability, Dex, DexItem, InheritedMove, LearnedMove, Move, Pokemon
+from back.fuzzy import foldName, getDistance
+from back.utils import Fail, getMuOSEmbed, paginate
 from discord.ext import commands
 from back.pkmn import MISSINGNO
+from back.query import PlanCache, Query, compileQuery, normalizeQuery, splitOrder
 from sources.text import DEX as D
 
 Ctx = commands.Context
@@ -27,20 +32,187 @@ class Mode():
         return self.name
     
 class Qualifier(Mode, Generic[M]):
-    def __init__(self, names: list[str], key: Callable[[set[str]], Callable[[M], bool]]):
+    def __init__(self, names: list[str], key: Optional[Callable[[set[str]], Callable[[M], bool]]]=None, *, attribute: Optional[str]=None):
         super().__init__(names)
         self.key = key
+        # Qualifiers backed by one of the dex's indexes resolve to a bitmap of matches directly instead of testing every item in the dex.
+        self.attribute = attribute
     
     def getKey(self):
         return self.key
+    
+    def getAttribute(self):
+        return self.attribute
+    
+    def getColumn(self) -> Optional[str]:
+        return None
+    
+    def parse(self, target: str) -> Any:
+        """ Turns the words after the qualifier into what `getBitmap` searches for, or None if they don't make sense for it. """
+
+        return target
+    
+    def getBitmap(self, dex: Dex[M], target: str, candidates: Optional[int]=None):
+        """ Returns the bitmap of the items in `candidates` (or the whole dex) that match `target`. """
+
+        if candidates is None:
+            candidates = dex.getUniverse()
+        if self.attribute:
+            return dex.lookup(self.attribute, target) & candidates
+        return dex.filter(candidates, self.key(target))
+    
+    def estimate(self, dex: Dex[M], target: str):
+        """ How many items `target` can match. Indexed qualifiers know exactly; anything else could match the whole dex. """
+
+        if self.attribute:
+            return dex.getCardinality(self.attribute, target)
+        return len(dex.getAllNames())
+    
+    def getScores(self, dex: Dex[M], target: Any) -> Optional[np.ndarray]:
+        """ How relevant every item is to `target`, for qualifiers whose results are ranked. """
+
+        return None
+
+class TextQualifier(Qualifier[M]):
+    """ A qualifier over the dex's full-text index, like `effect "raises speed"`. Its matches are ranked by relevance. """
+
+    def parse(self, target: str):
+        return target.strip('"')
+    
+    def getBitmap(self, dex: Dex[M], target: str, candidates: Optional[int]=None):
+        if candidates is None:
+            candidates = dex.getUniverse()
+        return dex.searchText(target)[0] & candidates
+    
+    def estimate(self, dex: Dex[M], target: str):
+        return bitmap.count(dex.searchText(target)[0])
+    
+    def getScores(self, dex: Dex[M], target: str):
+        return dex.searchText(target)[1]
+
+numberPat = r"-?\d+(?:\.\d+)?"
+rangePat = re.compile(rf"(?:(<=|>=|!=|<|>|=) )?({numberPat})|between ({numberPat}) and ({numberPat})")
+
+class RangeQualifier(Qualifier[M]):
+    """ A qualifier over one of the dex's numeric columns, like `speed > 100` or `bst between 500 and 600`. """
+
+    def __init__(self, names: list[str], column: str):
+        super().__init__(names)
+        self.column = column
+    
+    def getColumn(self):
+        return self.column
+    
+    def parse(self, target: str):
+        match = rangePat.fullmatch(target)
+        if not match:
+            return None
+        op, value, low, high = match.groups()
+        if low is not None:
+            return ("between", float(low), float(high))
+        return (op or "=", float(value))
+    
+    def getBitmap(self, dex: Dex[M], target: tuple, candidates: Optional[int]=None):
+        if candidates is None:
+            candidates = dex.getUniverse()
+        return dex.select(self.column, *target) & candidates
+    
+    def estimate(self, dex: Dex[M], target: tuple):
+        return bitmap.count(dex.select(self.column, *target))
+
+levelWordPat = r"(?:levels?|lvl|lv)"
+levelRangePat = re.compile(rf"(.+?)(?: (?:by|before) {levelWordPat} (\d+)| at {levelWordPat} (\d+)| between (?:{levelWordPat} )?(\d+) and (?:{levelWordPat} )?(\d+))?")
+
+def parseLevels(target: str) -> tuple[str, Optional[int], Optional[int]]:
+    """ Splits a name from the level range after it, like `thunderbolt by level 30`. Both ends are None if there's no range. """
+
+    name, by, at, low, high = levelRangePat.fullmatch(target).groups()
+    if by is not None:
+        return (name, 0, int(by))
+    if at is not None:
+        return (name, int(at), int(at))
+    if low is not None:
+        return (name, min(int(low), int(high)), max(int(low), int(high)))
+    return (name, None, None)
+
+class LevelQualifier(Qualifier[Pokemon]):
+    """ A qualifier for the Pokemon that learn a move, like `learn thunderbolt`, or that learn it by level-up in a level range, like `learn thunderbolt by level 30`. """
+
+    def parse(self, target: str):
+        name, low, high = parseLevels(target)
+        move = findItem(MOVEDEX, name)
+        if not move:
+            raise Fail(D.ERR.MOVE_NOT_FOUND(name))
+        return (move.getName(), low, high)
+    
+    def getBitmap(self, dex: Dex[Pokemon], target: tuple, candidates: Optional[int]=None):
+        if candidates is None:
+            candidates = dex.getUniverse()
+        move, low, high = target
+        if low is None:
+            return dex.lookup("move", move) & candidates
+        return POKEDEX.getLevelLearners(move, low, high) & candidates
+    
+    def estimate(self, dex: Dex[Pokemon], target: tuple):
+        move, low, high = target
+        if low is None:
+            return dex.getCardinality("move", move)
+        return bitmap.count(POKEDEX.getLevelLearners(move, low, high))
+
+class LearnsetQualifier(Qualifier[Move]):
+    """ A qualifier for the moves a Pokemon learns, like `pokemon gardevoir`, or learns by level-up in a level range, like `pokemon gardevoir between 20 and 40`. """
+
+    def parse(self, target: str):
+        name, low, high = parseLevels(target)
+        pkmn = findItem(POKEDEX, name)
+        if not pkmn:
+            raise Fail(D.ERR.PKMN_NOT_FOUND(name))
+        return (pkmn.getName(), low, high)
+    
+    def getMoves(self, target: tuple):
+        name, low, high = target
+        if low is None:
+            return POKEDEX.get(name).getMoves()
+        return [move for _, move in POKEDEX.getLevelMoves(name, low, high)]
+    
+    def getBitmap(self, dex: Dex[Move], target: tuple, candidates: Optional[int]=None):
+        if candidates is None:
+            candidates = dex.getUniverse()
+        return dex.encodeNames(self.getMoves(target)) & candidates
+    
+    def estimate(self, dex: Dex[Move], target: tuple):
+        return len(self.getMoves(target))
 
 class ModifierMode(Mode, Generic[M]):
-    def __init__(self, names: list[str], key: Callable[[M], bool]):
+    def __init__(self, names: list[str], key: Optional[Callable[[M], bool]]=None, *, flag: Optional[str]=None, attribute: Optional[str]=None, group: Optional[str]=None):
         super().__init__(names)
         self.key = key
+        # Modifiers backed by one of the dex's flags or indexes use the set it precomputed when it loaded.
+        self.flag = flag
+        self.attribute = attribute
+        # Modifiers in the same group widen each other, like `baby legendary`, and modifiers in different groups narrow each other, like `physical fire`.
+        self.group = group
+        self.bitmaps: dict[int, int] = {}
     
     def getKey(self):
         return self.key
+    
+    def getFlag(self):
+        return self.flag
+    
+    def getGroup(self):
+        return self.group
+    
+    def getBitmap(self, dex: Dex[M]):
+        """ Returns the bitmap of every item in the dex that this modifier lets through. It never changes, so it's only worked out once. """
+
+        if self.flag:
+            return dex.getFlag(self.flag)
+        if self.attribute:
+            return dex.lookup(self.attribute, self.name)
+        if not id(dex) in self.bitmaps:
+            self.bitmaps[id(dex)] = dex.filter(dex.getUniverse(), self.key)
+        return self.bitmaps[id(dex)]
 
 class BaseMode(Mode, Generic[M]):
     def __init__(self, names: list[str], cls: Type[M], dex: Dex[M], sender: Callable[[Ctx, str, set[M]], Coroutine[Any, Any, None]], extraModes: list[Qualifier[M]], modifiers: list[ModifierMode[M]]):
@@ -72,76 +244,119 @@ class BaseMode(Mode, Generic[M]):
                 return modifier
         return None
     
+    def getQualifiers(self):
+        return self.extraModes
+    
     def getModifiers(self):
         return self.modifiers
 
-def getItemsSender(single: Callable[[set[M]], list], multi: Callable[[str, set[M]], list]):
-    async def sendItems(ctx: Ctx, query: str, items: set[M]):
-        if len(items) == 1:
-            pages = single(*items)
+def getItemsSender(dex: Dex[M], single: Callable[[M], list], multi: Callable[[str, list[str], bool], list]):
+    async def sendItems(ctx: Ctx, query: str, names: Union[set[str], list[str]], ordered: bool=False, item: Optional[M]=None):
+        """ Sends the pages for a lone match, or a list of the display names of every match. Only a lone match gets built, unless it's given as `item`. """
+
+        if len(names) == 1:
+            pages = single(item or dex.get(*names))
         else:
-            pages = multi(query, items)
+            pages = multi(query, [dex.getDispName(name) for name in names], ordered)
         await paginate(ctx, pages)
     return sendItems
 
 POKEMON = BaseMode(
     ["pokemon", "pkmn"],
-    Pokemon, POKEDEX, getItemsSender(D.GET_PKMN_PAGES, D.GET_PKMN_LIST_PAGES),
+    Pokemon, POKEDEX, getItemsSender(POKEDEX, D.GET_PKMN_PAGES, D.GET_PKMN_LIST_PAGES),
     [
         Qualifier(
             ["move", "moves"],
-            lambda targets: lambda pkmn: pkmn.searchMoves(targets)
+            attribute="move"
         ),
         Qualifier(
             ["ability", "abilities"],
-            lambda targets: lambda pkmn: pkmn.searchAbilities(targets)
+            attribute="ability"
         ),
         Qualifier(
             ["type", "types"],
-            lambda targets: lambda pkmn: any(typ in targets for typ in pkmn.getTypes())
+            attribute="type"
         ),
         Qualifier(
             ["color"],
-            lambda targets: lambda pkmn: pkmn.getColor() in targets
+            attribute="color"
         ),
         Qualifier(
             ["group", "egg", "groups", "eggs"],
-            lambda targets: lambda pkmn: any(group in targets for group in pkmn.getEggGroups())
-        )
+            attribute="group"
+        ),
+        LevelQualifier(["learn", "learns", "learned"]),
+        RangeQualifier(["hp"], "hp"),
+        RangeQualifier(["attack", "atk"], "attack"),
+        RangeQualifier(["defense", "def"], "defense"),
+        RangeQualifier(["special-attack", "spatk", "spa"], "special-attack"),
+        RangeQualifier(["special-defense", "spdef"], "special-defense"),
+        RangeQualifier(["speed", "spe", "spd"], "speed"),
+        RangeQualifier(["bst", "total"], "bst"),
+        RangeQualifier(["hp-ev"], "hp-ev"),
+        RangeQualifier(["attack-ev", "atk-ev"], "attack-ev"),
+        RangeQualifier(["defense-ev", "def-ev"], "defense-ev"),
+        RangeQualifier(["special-attack-ev", "spatk-ev", "spa-ev"], "special-attack-ev"),
+        RangeQualifier(["special-defense-ev", "spdef-ev"], "special-defense-ev"),
+        RangeQualifier(["speed-ev", "spe-ev", "spd-ev"], "speed-ev"),
+        RangeQualifier(["evs", "ev"], "evs"),
+        RangeQualifier(["height"], "height"),
+        RangeQualifier(["weight"], "weight"),
+        RangeQualifier(["id", "number", "dex"], "id"),
+        RangeQualifier(["gen", "generation"], "gen")
     ],
     [
         ModifierMode(
             ["baby", "smol"],
-            lambda pkmn: pkmn.getIsBaby()
+            lambda pkmn: pkmn.getIsBaby(),
+            flag="baby"
         ),
         ModifierMode(
             ["legendary"],
-            lambda pkmn: pkmn.getIsLegendary()
+            lambda pkmn: pkmn.getIsLegendary(),
+            flag="legendary"
         ),
         ModifierMode(
             ["mythical", "mythic"],
-            lambda pkmn: pkmn.getIsMythical()
+            lambda pkmn: pkmn.getIsMythical(),
+            flag="mythical"
         )
     ]
 )
 MOVE = BaseMode(
     ["move", "moves"],
-    Move, MOVEDEX, None,
+    Move, MOVEDEX, getItemsSender(MOVEDEX, D.GET_MOVE_PAGES, D.GET_MOVE_LIST_PAGES),
     [
         Qualifier(
             ["type", "types"],
-            lambda targets: lambda pkmn: any(typ in targets for typ in pkmn.getTypes())
-        )
+            attribute="type"
+        ),
+        Qualifier(
+            ["class", "category"],
+            attribute="class"
+        ),
+        Qualifier(
+            ["target", "targets"],
+            attribute="target"
+        ),
+        LearnsetQualifier(["pokemon", "pkmn", "learner", "learners"]),
+        TextQualifier(["effect", "effects", "text"]),
+        RangeQualifier(["power", "pow", "bp"], "power"),
+        RangeQualifier(["accuracy", "acc"], "accuracy"),
+        RangeQualifier(["pp"], "pp"),
+        RangeQualifier(["chance"], "chance"),
+        RangeQualifier(["gen", "generation"], "gen")
     ],
-    [
-        
-    ]
+    # Moves can be narrowed down by their damage class and type, like `physical fire moves`.
+    [ModifierMode([cls], attribute="class", group="class") for cls in MOVEDEX.getValues("class")] +
+    [ModifierMode([typ], attribute="type", group="type") for typ in MOVEDEX.getValues("type")]
 )
 ABILITY = BaseMode(
     ["ability", "abilities"],
-    Ability, ABILITYDEX, None,
+    Ability, ABILITYDEX, getItemsSender(ABILITYDEX, D.GET_ABILITY_PAGES, D.GET_ABILITY_LIST_PAGES),
     [
-
+        TextQualifier(["effect", "effects", "text"]),
+        RangeQualifier(["gen", "generation"], "gen")
     ],
     [
 
@@ -159,10 +374,19 @@ def matchType(typ: Type[DexItem]):
         if member.getCls() == typ:
             return member
 
-withPat = re.compile(r"\s+with\s+")
-andOrPat = re.compile(r"(?:\s*,)?((?:\s+and\s+)|(?:\s+or\s+))|(?:\s*,\s*)")
+def findItem(dex: Dex[M], name: str) -> Optional[M]:
+    """ Finds an item by its raw name, then by its display name, then by the closest name in the dex. """
+
+    return dex.get(name.lower()) or dex.getByDispName(name) or NAMES.find(name, [dex])
+
+withPat = re.compile(r"\s+(?:with|that)\s+")
+# `moves gardevoir learns between 20 and 40` is the same as `moves with pokemon gardevoir between 20 and 40`.
+learnsPat = re.compile(r"(.*\bmoves?) (.+?) (?:learns?|can learn)(?: (.+))?")
 andOrSplitPat = re.compile(r"(?:\s*,)?(?:\s+and\s+)|(?:\s+or\s+)|(?:\s*,\s*)")
 forPat = re.compile(r"\s+for\s+")
+byMovesPat = re.compile(r"\s+by\s+(?:moves|moveset|learnset)\s*$", re.IGNORECASE)
+
+QUERIES = PlanCache()
 
 class CogDex(commands.Cog, name=D.COG.NAME, description=D.COG.DESC):
     def __init__(self, bot: commands.Bot):
@@ -171,106 +395,63 @@ class CogDex(commands.Cog, name=D.COG.NAME, description=D.COG.DESC):
 
     @commands.command(**D.QUERY.meta)
     async def query(self, ctx: Ctx, *, query: str):
-        # A list of all matched items.
-        matches: set[DexItem] = set()
-        # The type of item to match.
-        mode: Optional[BaseMode] = None
-        
+        # Popular queries are only parsed and planned the first time they're asked.
+        normalized = normalizeQuery(query)
+        compiled = QUERIES.get(normalized)
+        if not compiled:
+            compiled = self.compile(normalized, query)
+            if compiled:
+                QUERIES.put(normalized, compiled)
+
+        if not compiled:
+            # If we don't have a mode, we want to do a specific search.
+            found = self.specificSearch(query.lower())
+            # If we don't have a mode and the specific search fails, error.
+            if not found:
+                raise Fail(D.ERR.NO_MODE(query, [m.getName() for m in MODES]))
+            await matchType(found[0].__class__).getSender()(ctx, query, [found[0].getName()], item=found[0])
+            return
+        # Otherwise, evaluate the compiled query. Items only get built to be shown on their own.
+        matches = compiled.collect()
+        if not matches:
+            await ctx.send(D.INFO.NO_MATCH(query))
+            return
+        await compiled.getMode().getSender()(ctx, query, matches, isinstance(matches, list))
+    
+    def compile(self, normalized: str, query: str) -> Optional[Query]:
+        """ Parses and plans a normalized query, or returns None if it doesn't name a mode. """
+
+        # Split off the order to return results in, if any
+        normalized, order = splitOrder(normalized)
+        learns = learnsPat.fullmatch(normalized)
+        if learns and not withPat.search(normalized):
+            modeStr, pkmnStr, levels = learns.groups()
+            normalized = f"{modeStr} with pokemon {pkmnStr} {levels or ''}".strip()
         # Split by 'with'
-        if withPat.search(query):
-            split = withPat.split(query, 1)
+        if withPat.search(normalized):
             # The string with the type of item to match; everything after
-            modeStr, qualifiersStr = split
+            modeStr, qualifiersStr = withPat.split(normalized, 1)
         else:
             # The string with the type of item to match; everything after
-            modeStr, qualifiersStr = query, ""
+            modeStr, qualifiersStr = normalized, ""
         # Split by space to collect modifiers to the item to match (baby, legendary, etc.)
         split = spacePat.split(modeStr)
-        # List of modifiers.
-        modifs = split[:-1]
         # The BaseMode object for the type of item to match.
         mode = match(split[-1])
-
         if not mode:
-            # If we don't have a mode, we want to do a specific search.
-            matches |= set(self.specificSearch(query.lower()))
-            # If we don't have a mode and the specific search fails, error.
-            if not matches:
-                raise Fail(D.ERR.NO_MODE(query, [m.getName() for m in MODES]))
-        else:
-            # Otherwise, run the mode search routine.
-            matches = self.modeSearch(mode, qualifiersStr.lower().strip(), modifs, query)
-        if not matches:
-            await ctx.send(D.INFO.NO_MATCH(query))
-            return
-        if not mode:
-            for item in matches: break
-            mode = matchType(item.__class__)
-        await mode.getSender()(ctx, query, matches)
+            return None
+        return compileQuery(mode, split[:-1], qualifiersStr, query, order)
         
     def specificSearch(self, query: str):
         if POKEDEX.get(query):
             return [POKEDEX.get(query)]
-        shuffled = shuffleWord(query)
-        if "missingno" in shuffled:
+        for dex in [POKEDEX, MOVEDEX, ABILITYDEX]:
+            if dex.getByDispName(query):
+                return [dex.getByDispName(query)]
+        if getDistance(foldName(query), MISSINGNO.getName(), 1) <= 1:
             return [MISSINGNO]
-        pkmn = POKEDEX.searchByNames(shuffled)
-        if pkmn: return [pkmn]
-        move = MOVEDEX.searchByNames(shuffled)
-        if move: return [move]
-        ability = ABILITYDEX.searchByNames(shuffled)
-        if ability: return [ability]
-        return []
-    
-    def modeSearch(self, mode: BaseMode, qualifiersStr: str, modifiers: list[str], query: str):
-        matches = set()
-        # If we do have a mode, get the dex to collect from from the mode.
-        dex = mode.getDex()
-
-        for modifierStr in modifiers:
-            # Validate each modifier from the list of modifiers.
-            modifier = mode.getModifier(modifierStr)
-            if not modifier:
-                raise Fail(D.ERR.BAD_MODIFIER(query, modifierStr, mode.getName(), [m.getName() for m in mode.getModifiers()]))
-            key = modifier.getKey()
-            # Update the collected items.
-            matches |= dex.collect(key)
-        
-        # The attributes each matched item must have.
-        qualifier: Optional[Qualifier] = None
-        # Each boolean operator in the rest of the query.
-        opFinds = [s.strip() for s in andOrPat.findall(qualifiersStr) if s.strip()]
-        # We can only have one operator. The default is "and".
-        op = "and" if not opFinds else opFinds[0]
-        # Make sure no other operators exist - can't mix.
-        for otherOp in opFinds:
-            if otherOp != op: raise Fail(D.ERR.MIXING_OPS(query))
-
-        # Iterate through each qualifier.
-        for qualifierStr in andOrSplitPat.split(qualifiersStr):
-            if not qualifierStr: continue
-            # Split by the first space - the first word of the qualifier string can be the qualifier mode.
-            split = spacePat.split(qualifierStr, 1)
-            # We want to be able to use the same qualifier mode as last time for instances like 
-            #  `mew.query pokemon with moves Tri Attack, Tackle`,
-            #  where both Tri Attack and Tackle will be treated as move searches.
-            if mode.getQualifier(split[0]):
-                qualifier = mode.getQualifier(split[0])
-                rest = split[1]
-            else:
-                rest = qualifierStr
-            # If the first qualifier string doesn't have a qualifier mode, fail.
-            if not qualifier: raise Fail(D.ERR.NO_EXTRA_MODE(query, qualifierStr))
-            key = qualifier.getKey()(rest)
-            extraMatches = dex.collect(key)
-            # Check whether or not we're supposed to be adding all matches or intersecting with existing matches.
-            if op == "or" or not op or not matches:
-                matches |= extraMatches
-            else:
-                matches &= extraMatches
-                if not matches:
-                    break
-        return matches
+        # The closest name across the Pokedex, Movedex and Abilitydex, in that order of preference.
+        return NAMES.search(query)[:1]
     
     @commands.command(**D.CHECK.meta)
     async def check(self, ctx: Ctx, *, toCheck: str):
@@ -284,37 +465,33 @@ class CogDex(commands.Cog, name=D.COG.NAME, description=D.COG.DESC):
         if not targetMovesStrs:
             raise Fail(D.ERR.NO_MOVES)
 
-        targetPkmn = POKEDEX.get(targetPkmnStr.lower())
-        if not targetPkmn:
-            shuffled = shuffleWord(targetPkmnStr.lower())
-            targetPkmn = POKEDEX.searchByNames(shuffled)
+        targetPkmn = findItem(POKEDEX, targetPkmnStr)
         if not targetPkmn:
             raise Fail(D.ERR.PKMN_NOT_FOUND(targetPkmnStr))
         targetMoves: list[Move] = []
         for moveStr in targetMovesStrs:
-            move = MOVEDEX.get(moveStr.lower())
-            if not move:
-                shuffled = shuffleWord(moveStr.lower())
-                move = MOVEDEX.searchByNames(shuffled)
+            move = findItem(MOVEDEX, moveStr)
             if not move:
                 raise Fail(D.ERR.MOVE_NOT_FOUND(moveStr))
             targetMoves.append(move)
         
-        results: list[Union[Move, LearnedMove]] = []
+        # Moves the Pokemon can't learn at all are listed as the plain move.
+        learnset = POKEDEX.getLearnset(targetPkmn.getName())
+        results: list[Union[Move, LearnedMove, InheritedMove]] = []
         for move in targetMoves:
-            if targetPkmn.hasMove(move):
-                learnedMove = targetPkmn.getMove(move.getName())
-                results.append(learnedMove)
-            else:
-                learnedMove = None
-                for prevoName in targetPkmn.getPrevolutions():
-                    prevo = POKEDEX.get(prevoName)
-                    if not prevo:
-                        print(prevoName)
-                    elif prevo.hasMove(move):
-                        learnedMove = prevo.getMove(move.getName()).getNewWithPrevo(prevo.dispName())
-                        results.append(learnedMove)
-                if not learnedMove:
-                    results.append(move)
+            results += learnset.get(move.getName(), [move])
         
         await ctx.send(embed=getMuOSEmbed(**D.INFO.RESULT_HAS(results)))
+    
+    @commands.command(**D.SIMILAR.meta)
+    async def similar(self, ctx: Ctx, *, pkmnStr: str):
+        byMoves = bool(byMovesPat.search(pkmnStr))
+        pkmnStr = byMovesPat.sub("", pkmnStr)
+        targetPkmn = findItem(POKEDEX, pkmnStr)
+        if not targetPkmn:
+            raise Fail(D.ERR.PKMN_NOT_FOUND(pkmnStr))
+        if byMoves:
+            similar = POKEDEX.getSimilarLearnsets(targetPkmn.getName())
+        else:
+            similar = POKEDEX.getSimilar(targetPkmn.getName())
+        await paginate(ctx, D.GET_SIMILAR_PAGES(targetPkmn, similar, byMoves))
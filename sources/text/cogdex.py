@@ -1,6 +1,6 @@
  
 from typing import Union
-from back.Dexes import LearnedMove, Method, Move, Pokemon
+from back.Dexes import Ability, InheritedMove, LearnedMove, Method, Move, Pokemon
 from back.general import Cmd, EMPTY, NEWLINE, chunks, evenChunks, padItems
 
 class COG:
@@ -18,8 +18,18 @@ class QUERY(Cmd,
         "porygon-z",
         "pokemon with moves trick room and tri attack",
         "legendary pokemon",
-        "pokemon with types water, electric"
+        "pokemon with types water, electric",
         "baby pokemon with ability natural cure",
+        "pokemon with (types ghost or types fairy) and not moves tackle",
+        "pokemon with speed > 100 and bst between 500 and 600",
+        "pokemon with types ghost sort by speed desc limit 10",
+        "pokemon with at least 2 of (moves trick room, tri attack, wish)",
+        "pokemon that learn thunderbolt by level 30",
+        "physical fire moves with power > 90",
+        "special moves with accuracy >= 90 sort by power desc limit 10",
+        "moves gardevoir learns between 20 and 40",
+        "moves with effect \"raises speed\"",
+        "abilities with effect \"weather\"",
     ]
 ): pass
 class CHECK(Cmd,
@@ -35,14 +45,31 @@ class CHECK(Cmd,
     ]
 ): pass
 
+class SIMILAR(Cmd,
+    meta=[
+        "similar", "like",
+        f"""
+            This command will list the Pokemon that are most like a given Pokemon.
+            Pokemon are compared by their base stats, their types and their abilities, or by the moves they learn if "by moves" is added after the Pokemon's name.
+        """
+    ],
+    usage=[
+        "gardevoir",
+        "gengar",
+        "gardevoir by moves"
+    ]
+): pass
+
 _forQuery = lambda query: f"For query `{query}`:\n"
 _forExtra = lambda extra: f"For the specification `{extra}`, "
 class ERR:
     # Query
     NO_MODE = lambda query, modes: f"{_forQuery(query)}If you're looking for a specific Pokemon/move/ability, you might have misspelled it.\nA mode (`{'`, `'.join(modes)}`) defining what kind of resource to look for must be provided for non-specific queries."
     BAD_MODIFIER = lambda query, bad, mode, modifiers: f"{_forQuery(query)}The modifier `{bad}` is an invalid modifier. Use one of the following modifiers for the mode {mode}: `{'`, `'.join(modifiers)}`"
-    MIXING_OPS = lambda query: f"{_forQuery(query)}The combination of `and` and `or` in a single query is not implemented."
+    BAD_SYNTAX = lambda query, token: f"{_forQuery(query)}" + (f"`{token}` doesn't belong there." if token else "The query ended too early.") + " Clauses can be joined with `and`, `or` and `not`, and grouped with parentheses."
     NO_EXTRA_MODE = lambda query, extra: f"{_forQuery(query)}{_forExtra(extra)}an attribute of the target resource must be given. An attribute is something like `move`, `type`, `ability`, etc."
+    BAD_ORDER = lambda query, bad, keys: f"{_forQuery(query)}Results can't be sorted by `{bad}`. Sort by one of the following: `{'`, `'.join(keys)}`"
+    BAD_RANGE = lambda query, extra, qualifier: f"{_forQuery(query)}{_forExtra(extra)}`{qualifier}` must be compared to a number, like `{qualifier} > 100`, `{qualifier} <= 50` or `{qualifier} between 50 and 80`."
     # Check
     NO_FOR = f"The correct formatting for this command is `{CHECK.ref} [Pokemon] for [Moves]`, where\n  [Pokemon] is the Pokemon target, and\n  [Moves] is a comma-separated list of moves to check the target's moveset for."
     NO_PKMN = f"A target Pokemon was not specified."
@@ -119,19 +146,39 @@ def addMoves(pkmn: Pokemon, method: str, title: str, fields: list[list[tuple[str
     ret[0][0] = title
     fields.append(ret)
 
-def GET_PKMN_LIST_PAGES(title: str, pkmnList: list[Pokemon]):
-    pkmnList = sorted(pkmnList, key=lambda pkmn: pkmn.dispName())
-    fields = [(EMPTY, "```\n"+"\n".join(pkmn.dispName() for pkmn in chunk) + "```", True) for chunk in chunks(pkmnList, 10)]
+def GET_PKMN_LIST_PAGES(title: str, names: list[str], ordered: bool=False):
+    if not ordered:
+        names = sorted(names)
+    fields = [(EMPTY, "```\n"+"\n".join(chunk) + "```", True) for chunk in chunks(names, 10)]
     pages = []
     for chunk in chunks(fields, 3):
         embed = dict(
             title=title,
-            description=f"{len(pkmnList)} results",
+            description=f"{len(names)} results",
             fields=chunk
         )
         pages.append(embed)
     return pages
 
+def GET_SIMILAR_PAGES(pkmn: Pokemon, similar: list[tuple[Pokemon, float]], byMoves: bool=False):
+    if not similar:
+        return [dict(
+            title=f"Pokemon similar to {pkmn.dispName()}",
+            thumbnail=pkmn.getImageURL(),
+            description="No Pokemon learn enough of the same moves." if byMoves else "No similar Pokemon were found."
+        )]
+    lines = padItems(
+        similar,
+        lambda found: found[0].dispName(),
+        "  ",
+        (lambda found: f"~{round(found[1] * 100)}% of moves shared") if byMoves else (lambda found: "/".join(found[0].dispTypes()))
+    )
+    return [dict(
+        title=f"Pokemon {'with movesets ' if byMoves else ''}similar to {pkmn.dispName()}",
+        thumbnail=pkmn.getImageURL(),
+        description=f"```{NEWLINE}{NEWLINE.join(lines)}```"
+    )]
+
 def GET_MOVE_PAGES(move: Move):
     return [{
         "title": move.dispName(),
@@ -144,23 +191,48 @@ def GET_MOVE_PAGES(move: Move):
         ]
     }]
 
-def GET_MOVE_LIST_PAGES(title: str, moves: list[Move]):
-    moves = sorted(moves, key=lambda move: move.dispName())
-    fields = [(EMPTY, "```\n"+"\n".join(move.dispName() for move in chunk)+"```", True) for chunk in chunks(moves, 10)]
+def GET_MOVE_LIST_PAGES(title: str, names: list[str], ordered: bool=False):
+    if not ordered:
+        names = sorted(names)
+    fields = [(EMPTY, "```\n"+"\n".join(chunk)+"```", True) for chunk in chunks(names, 10)]
+    pages = []
+    for chunk in chunks(fields, 3):
+        embed = dict(
+            title=title,
+            description=f"{len(names)} results",
+            fields=chunk
+        )
+        pages.append(embed)
+    return pages
+
+def GET_ABILITY_PAGES(ability: Ability):
+    return [{
+        "title": ability.dispName(),
+        "url": f"https://pokemondb.net/ability/{ability.getName()}",
+        "description": ability.getEffect(),
+        "fields": [
+            ("Generation", ability.getGen().split("-")[-1].upper(), True)
+        ]
+    }]
+
+def GET_ABILITY_LIST_PAGES(title: str, names: list[str], ordered: bool=False):
+    if not ordered:
+        names = sorted(names)
+    fields = [(EMPTY, "```\n"+"\n".join(chunk)+"```", True) for chunk in chunks(names, 10)]
     pages = []
     for chunk in chunks(fields, 3):
         embed = dict(
             title=title,
-            description=f"{len(moves)} results",
+            description=f"{len(names)} results",
             fields=chunk
         )
         pages.append(embed)
     return pages
 
-def _resultHas(items: list[Union[LearnedMove, Move]]):
+def _resultHas(items: list[Union[LearnedMove, InheritedMove, Move]]):
     return padItems(
         items,
-        lambda move: ("+ " if isinstance(move, LearnedMove) else "- ") + move.dispName(),
+        lambda move: ("+ " if not isinstance(move, Move) else "- ") + move.dispName(),
         " ",
-        lambda move: f"(via {move.dispMethods()})" if isinstance(move, LearnedMove) else ""
+        lambda move: f"(via {move.dispMethods()})" if not isinstance(move, Move) else ""
     )
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The dexes load from paths relative to the repository root, like the bot does.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+MOVES = ["tackle", "vise-grip", "heat-wave", "thunderbolt", "work-up", "hammer-arm"]
+
+class StubAPI:
+    """ A small, made up PokeAPI and pokemondb, served on localhost so that the scraper can be run without the real sites.
+        Pokemon come in pairs of varieties of one species, and species in families of three that share an evolution chain.
+        `failures` maps a path to the statuses to answer it with, one per request, before serving it normally,
+        and `stalls` to how many requests for it to take `stallTime` seconds to answer. `overrides` maps a path to a page to serve instead. """
+
+    def __init__(self, size: int=12):
+        self.size = size
+        self.pokemon = {i: self.makePokemon(i) for i in range(1, size + 1)}
+        self.failures: dict[str, list[int]] = {}
+        self.stalls: Counter[str] = Counter()
+        self.stallTime = 1.0
+        self.overrides: dict[str, Any] = {}
+        self.requests: Counter[str] = Counter()
+        self.notModified = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def getURL(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def makePokemon(self, i: int):
+        rand = random.Random(i)
+        return {
+            "id": i,
+            "species": {"url": f"/api/v2/pokemon-species/{(i + 1) // 2}/"},
+            "forms": [{"url": f"/api/v2/pokemon-form/{i}/"}],
+            "height": i,
+            "weight": 2 * i,
+            "abilities": [{"ability": {"name": "static"}, "is_hidden": False}, {"ability": {"name": "lightning-rod"}, "is_hidden": True}],
+            "moves": [{"move": {"name": move}, "version_group_details": [{"version_group": {"name": "ultra-sun-ultra-moon"}, "move_learn_method": {"name": "level-up"}, "level_learned_at": rand.randint(1, 50)}]} for move in rand.sample(MOVES, 3)],
+            "stats": [{"stat": {"name": stat}, "base_stat": rand.randint(20, 150), "effort": 1} for stat in ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]],
+            "types": [{"slot": 2, "type": {"name": "fairy"}}, {"slot": 1, "type": {"name": "electric"}}]
+        }
+
+    def getSpecies(self, j: int):
+        return {
+            "varieties": [{"is_default": True, "pokemon": {"name": f"mon{2 * j - 1}", "url": f"/api/v2/pokemon/{2 * j - 1}/"}}, {"is_default": False, "pokemon": {"name": f"mon{2 * j}", "url": f"/api/v2/pokemon/{2 * j}/"}}],
+            "names": [{"language": {"name": "en"}, "name": f"Flabébé {j}"}],
+            "evolution_chain": {"url": f"/api/v2/evolution-chain/{(j + 2) // 3}/"},
+            "is_baby": False,
+            "is_legendary": j % 7 == 0,
+            "is_mythical": False,
+            "egg_groups": [{"name": "fairy"}],
+            "color": {"name": "white"},
+            "shape": {"name": "arms"},
+            "generation": {"name": "generation-vi"}
+        }
+
+    def getForm(self, i: int):
+        return {"is_default": True, "names": [] if i % 2 else [{"language": {"name": "en"}, "name": f"Mon {i} Form"}], "is_battle_only": i % 5 == 0}
+
+    def getChain(self, k: int):
+        """ A family that branches, like Ralts': `a` evolves into `b` and `c`, and `b` into `d`. """
+
+        def link(name: str, level: Optional[int], evolvesTo: list):
+            details = [{"trigger": {"name": "level-up"}, "min_level": level, "item": None, "gender": None, "time_of_day": ""}] if level else []
+            return {"species": {"name": f"spc{k}{name}"}, "evolution_details": details, "evolves_to": evolvesTo}
+        return {"chain": link("a", None, [link("b", 20, [link("d", 30, [])]), link("c", 25, [])])}
+
+    def getMovesPage(self, i: int, gen: int):
+        rows = "".join(f'<tr><td class="cell-num">{random.Random(i * 10 + gen + k).randint(1, 60)}</td><td><a class="ent-name" href="/move/{move}">{move}</a></td></tr>' for k, move in enumerate(MOVES[:4]))
+        return ("<html><body><p>Flabébé learns the following moves in Pokémon Sword & Shield</p>"
+            f'<table class="data-table"><tr><th>Lv.</th></tr>{rows}</table>'
+            "<p>Flabébé learns the following moves via breeding in Pokémon Ultra Sun & Ultra Moon</p>"
+            f'<table class="data-table"><tr><th>x</th></tr>{rows}</table></body></html>')
+
+    def getPage(self, path: str) -> Optional[Any]:
+        """ The JSON or HTML at `path`, or None if there's nothing there. URLs in JSON are made absolute. """
+
+        if re.fullmatch(r"/api/v2/pokemon\?limit=\d+", path):
+            return {"results": [{"name": f"mon{i}", "url": f"/api/v2/pokemon/{i}/"} for i in self.pokemon]}
+        for pattern, get in [
+            (r"/api/v2/pokemon/(\d+)/", lambda i: self.pokemon.get(i)),
+            (r"/api/v2/pokemon-species/(\d+)/", self.getSpecies),
+            (r"/api/v2/pokemon-form/(\d+)/", self.getForm),
+            (r"/api/v2/evolution-chain/(\d+)/", self.getChain),
+            (r"/pokedex/(\d+)/moves/(\d)", self.getMovesPage)
+        ]:
+            match = re.fullmatch(pattern, path)
+            if match:
+                return get(*map(int, match.groups()))
+        return None
+
+    def respond(self, handler: BaseHTTPRequestHandler):
+        path = handler.path
+        self.requests[path] += 1
+        if self.stalls[path] > 0:
+            self.stalls[path] -= 1
+            time.sleep(self.stallTime)
+        if self.failures.get(path):
+            handler.send_response(self.failures[path].pop(0))
+            handler.end_headers()
+            return
+        page = self.overrides[path] if path in self.overrides else self.getPage(path)
+        if page is None:
+            handler.send_response(404)
+            handler.end_headers()
+            return
+        if isinstance(page, str):
+            data, contentType = page.encode(), "text/html; charset=utf-8"
+        else:
+            data, contentType = re.sub(r'"url": "/', f'"url": "{self.getURL()}/', json.dumps(page)).encode(), "application/json"
+        etag = '"' + hashlib.sha256(data).hexdigest() + '"'
+        if handler.headers.get("If-None-Match") == etag:
+            self.notModified += 1
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header("ETag", etag)
+        handler.send_header("Content-Type", contentType)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self, port: int=0):
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+            def do_GET(self): stub.respond(self)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    # To scrape by hand: python tests/stub.py 8765, then point MUOS_POKEAPI_URL at http://127.0.0.1:8765/api/v2 and MUOS_POKEMONDB_URL at http://127.0.0.1:8765.
+    stub = StubAPI(int(sys.argv[2]) if len(sys.argv) > 2 else 60).start(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Serving at {stub.getURL()}")
+    threading.Event().wait()
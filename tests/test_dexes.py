@@ -0,0 +1,21 @@
+import pytest
+
+from back.Dexes import getRawPrevolutions
+
+LEVEL = [["level-up", {"min_level": 20}]]
+RALTS = [["ralts", [], None], ["kirlia", LEVEL, "ralts"], ["gallade", LEVEL, "kirlia"], ["gardevoir", LEVEL, "kirlia"]]
+EEVEE = [["eevee", [], None], ["sylveon", LEVEL, "eevee"], ["jolteon", LEVEL, "eevee"], ["vaporeon", LEVEL, "eevee"]]
+
+@pytest.mark.parametrize("name, raw, expected", [
+    ("ralts", RALTS, []),
+    ("kirlia", RALTS, ["ralts"]),
+    ("gardevoir", RALTS, ["ralts", "kirlia"]),
+    ("gallade", RALTS, ["ralts", "kirlia"]),
+    ("jolteon", EEVEE, ["eevee"]),
+    ("vaporeon", EEVEE, ["eevee"]),
+])
+def testPrevolutionsFollowWhatEachSpeciesEvolvesFrom(name, raw, expected):
+    assert getRawPrevolutions(name, raw) == expected
+
+def testPrevolutionsWithoutParentsTakeTheChainInOrder():
+    assert getRawPrevolutions("gardevoir", [evo[:2] for evo in RALTS]) == ["ralts", "kirlia", "gallade"]
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+
+import pytest
+import requests
+
+import back.httpcache as httpcache
+import back.pokeapi as pokeapi
+from back.httpcache import BadStatus
+from back.journal import Journal
+from stub import StubAPI
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubAPI().start()
+    monkeypatch.setattr(pokeapi, "POKEAPI_URL", stub.getURL() + "/api/v2")
+    monkeypatch.setattr(pokeapi, "POKEMONDB_URL", stub.getURL())
+    monkeypatch.setattr(pokeapi, "HTTP_CACHE", None)
+    monkeypatch.setattr(httpcache, "RETRY_DELAY", 0)
+    yield stub
+    stub.stop()
+
+def build(fileName: str, concurrency: int=0, incremental: bool=False):
+    pokeapi.createNewDex(fileName, "pokemon", pokeapi.getPokemon, concurrency, incremental)
+    with open(fileName) as f:
+        return f.read()
+
+def testConcurrentBuildMatchesSequential(stub, tmp_path):
+    assert build(str(tmp_path / "sequential.json")) == build(str(tmp_path / "concurrent.json"), 4)
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+def testBusyServerIsAskedAgain(stub, tmp_path, concurrency):
+    expected = build(str(tmp_path / "expected.json"))
+    stub.requests.clear()
+    stub.failures = {"/api/v2/pokemon/3/": [429, 503], "/pokedex/4/moves/7": [503]}
+    assert build(str(tmp_path / "dex.json"), concurrency) == expected
+    assert stub.requests["/api/v2/pokemon/3/"] == 3
+    assert stub.requests["/pokedex/4/moves/7"] == 2
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+def testServerThatStaysBusyFails(stub, tmp_path, concurrency):
+    stub.failures = {"/api/v2/pokemon/3/": [503] * (httpcache.RETRIES + 1)}
+    with pytest.raises(BadStatus):
+        build(str(tmp_path / "dex.json"), concurrency)
+    assert stub.requests["/api/v2/pokemon/3/"] == httpcache.RETRIES + 1
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+def testStalledRequestIsAskedAgain(stub, tmp_path, monkeypatch, concurrency):
+    expected = build(str(tmp_path / "expected.json"))
+    monkeypatch.setattr(httpcache, "REQUEST_TIMEOUT", 0.2)
+    stub.requests.clear()
+    stub.stalls["/api/v2/pokemon/3/"] = 1
+    assert build(str(tmp_path / "dex.json"), concurrency) == expected
+    assert stub.requests["/api/v2/pokemon/3/"] == 2
+
+@pytest.mark.parametrize("concurrency, error", [(0, requests.Timeout), (4, asyncio.TimeoutError)])
+def testServerThatStaysStalledFails(stub, tmp_path, monkeypatch, concurrency, error):
+    monkeypatch.setattr(httpcache, "REQUEST_TIMEOUT", 0.1)
+    monkeypatch.setattr(httpcache, "RETRIES", 1)
+    stub.stallTime = 0.3
+    stub.stalls["/api/v2/pokemon/3/"] = 2
+    with pytest.raises(error):
+        build(str(tmp_path / "dex.json"), concurrency)
+    assert stub.requests["/api/v2/pokemon/3/"] == 2
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+@pytest.mark.parametrize("path", ["/pokedex/5/moves/8", "/api/v2/pokemon-species/3/"])
+def testErrorPagesAreNotParsed(stub, tmp_path, concurrency, path):
+    stub.failures = {path: [500]}
+    with pytest.raises(BadStatus) as e:
+        build(str(tmp_path / "dex.json"), concurrency)
+    assert e.value.status == 500
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+def testBuildResumesAfterAFailedEntry(stub, tmp_path, concurrency):
+    expected = build(str(tmp_path / "expected.json"))
+    fileName = str(tmp_path / "dex.json")
+    stub.failures = {"/api/v2/pokemon/7/": [500]}
+    with pytest.raises(BadStatus):
+        build(fileName, concurrency)
+    assert not os.path.exists(fileName)
+    journal = Journal(pokeapi.getJournalPath(fileName))
+    journaled = {int(name[len("mon"):]) for name in journal.urls}
+    journal.close()
+    assert 0 < len(journaled) < stub.size
+    stub.requests.clear()
+    assert build(fileName, concurrency) == expected
+    # Only the entries that weren't journaled are built again.
+    assert {i for i in stub.pokemon if stub.requests[f"/api/v2/pokemon-form/{i}/"]} == set(stub.pokemon) - journaled
+    assert not os.path.exists(pokeapi.getJournalPath(fileName))
+
+@pytest.mark.parametrize("value, expected", [(None, 8), ("0", 0), ("16", 16), ("-1", None), ("eight", None), ("", None)])
+def testScrapeConcurrency(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("MUOS_SCRAPE_CONCURRENCY", raising=False)
+    else:
+        monkeypatch.setenv("MUOS_SCRAPE_CONCURRENCY", value)
+    if expected is None:
+        with pytest.raises(ValueError, match="MUOS_SCRAPE_CONCURRENCY"):
+            pokeapi.getScrapeConcurrency()
+    else:
+        assert pokeapi.getScrapeConcurrency() == expected
+
+def testIncrementalRebuildOnlyCountsItsOwnRequests(stub, tmp_path, monkeypatch):
+    cache = httpcache.HTTPCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(pokeapi, "HTTP_CACHE", cache)
+    fileName = str(tmp_path / "dex.json")
+    build(fileName, 4)
+    stub.requests.clear()
+    stub.notModified = 0
+    build(fileName, 4, incremental=True)
+    assert cache.downloaded == 0
+    assert cache.revalidated == stub.notModified == sum(stub.requests.values())
+
+def testEvolutionsRecordWhatEachSpeciesEvolvesFrom(stub):
+    evolutions = pokeapi.run(pokeapi.getEvolutions({"url": f"{stub.getURL()}/api/v2/evolution-chain/1/"}), pokeapi.PageMemo())
+    assert sorted((name, parent) for name, _, parent in evolutions) == [("spc1a", None), ("spc1b", "spc1a"), ("spc1c", "spc1a"), ("spc1d", "spc1b")]
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+@pytest.mark.parametrize("cached", [False, True])
+def testIncrementalRebuildFetchesEachPageOnce(stub, tmp_path, monkeypatch, concurrency, cached):
+    if cached:
+        monkeypatch.setattr(pokeapi, "HTTP_CACHE", httpcache.HTTPCache(str(tmp_path / "cache")))
+    fileName = str(tmp_path / "dex.json")
+    build(fileName, concurrency)
+    chain = stub.getChain(1)
+    chain["chain"]["evolves_to"][1]["evolution_details"][0]["min_level"] = 26
+    stub.overrides["/api/v2/evolution-chain/1/"] = chain
+    stub.requests.clear()
+    build(fileName, concurrency, incremental=True)
+    assert stub.requests["/api/v2/evolution-chain/1/"] == 1
+    assert stub.requests["/api/v2/pokemon-species/1/"] == 1
+    assert max(stub.requests.values()) == 1
+
+LEARNSET = json.dumps({"moves": [{"move": {"name": f"move{i}"}, "level_learned_at": i} for i in range(100)]})
+
+def testPageMemoCountsPagesAsTheyAreKept():
+    pages = pokeapi.PageMemo()
+    pages.getPageDigest("http://stub/api/v2/pokemon/1/", lambda url: LEARNSET)
+    assert pages.size == pokeapi.getSize(LEARNSET)
+    pages.get("http://stub/api/v2/pokemon/1/", json.loads)
+    assert pages.size == pokeapi.getSize(json.loads(LEARNSET)) > len(LEARNSET)
+
+def testPageMemoDropsParsedPagesPastItsCap():
+    pages = pokeapi.PageMemo(maxBytes=pokeapi.getSize(json.loads(LEARNSET)) * 2)
+    for i in range(3):
+        pages.get(f"http://stub/api/v2/pokemon/{i}/", json.loads, lambda url: LEARNSET)
+    assert pages.evictions == 1 and len(pages.pages) == 2 and pages.size <= pages.maxBytes
+
+def readChanges(fileName: str):
+    with open(pokeapi.getReportPath(fileName)) as f:
+        return json.load(f)
+
+def changePokemon(stub: StubAPI):
+    stub.pokemon[5]["height"] = 999
+
+def addPokemon(stub: StubAPI):
+    stub.pokemon[13] = stub.makePokemon(13)
+
+def removePokemon(stub: StubAPI):
+    del stub.pokemon[12]
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+@pytest.mark.parametrize("change, expected", [
+    (changePokemon, {"added": [], "removed": [], "changed": ["mon5"], "rebuilt": ["mon5", "mon6"], "kept": 10, "changedPages": ["/api/v2/pokemon/5/"]}),
+    (addPokemon, {"added": ["mon13"], "removed": [], "changed": [], "rebuilt": [], "kept": 12, "changedPages": []}),
+    (removePokemon, {"added": [], "removed": ["mon12"], "changed": [], "rebuilt": [], "kept": 11, "changedPages": []}),
+])
+def testIncrementalRebuildMatchesAFreshBuild(stub, tmp_path, concurrency, change, expected):
+    fileName = str(tmp_path / "dex.json")
+    build(fileName, concurrency)
+    change(stub)
+    merged = build(fileName, concurrency, incremental=True)
+    assert merged == build(str(tmp_path / "fresh.json"), concurrency)
+    changes = readChanges(fileName)
+    changes["changedPages"] = [url[len(stub.getURL()):] for url in changes["changedPages"]]
+    assert changes == expected
+
+@pytest.mark.parametrize("incremental", [False, True])
+def testOfflineRebuildMatches(stub, tmp_path, monkeypatch, incremental):
+    cache = httpcache.HTTPCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(pokeapi, "HTTP_CACHE", cache)
+    fileName = str(tmp_path / "dex.json")
+    expected = build(fileName, 4)
+    cache.offline = True
+    stub.requests.clear()
+    assert build(fileName, 4, incremental) == expected
+    assert not stub.requests
+    assert cache.fromDisk > 0 and cache.downloaded == 0
+    if incremental:
+        assert readChanges(fileName) == {"added": [], "removed": [], "changed": [], "rebuilt": [], "kept": stub.size, "changedPages": []}
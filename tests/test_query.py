@@ -0,0 +1,98 @@
+import pytest
+
+from back.Dexes import POKEDEX
+from back.query import And, AtLeast, Clause, ModifierClause, Not, Or, Parser, normalizeQuery
+from back.utils import Fail
+from front.CogDex import POKEMON, CogDex
+
+def show(node):
+    """ A plain structure for a parsed node, so that tests don't depend on the planner's order. """
+
+    if isinstance(node, Clause):
+        return (node.qualifier.getName(), node.target)
+    if isinstance(node, ModifierClause):
+        return node.modifier.getName()
+    if isinstance(node, Not):
+        return ("not", show(node.child))
+    if isinstance(node, And):
+        return ("and", *[show(child) for child in node.children])
+    if isinstance(node, Or):
+        return ("or", *[show(child) for child in node.children])
+    if isinstance(node, AtLeast):
+        return (f"at least {node.count}", *[show(child) for child in node.children])
+    raise TypeError(node)
+
+def parse(expression: str, mode=POKEMON):
+    return show(Parser(mode, normalizeQuery(expression), expression).parse())
+
+def collect(query: str):
+    return CogDex(None).compile(normalizeQuery(query), query).collect()
+
+@pytest.mark.parametrize("expression, expected", [
+    ("moves tackle, defense curl", ("and", ("move", "tackle"), ("move", "defense curl"))),
+    ("ability levitate or speed boost", ("or", ("ability", "levitate"), ("ability", "speed boost"))),
+    ("moves tackle, speed swap", ("and", ("move", "tackle"), ("move", "speed swap"))),
+    ("moves tackle, attack order", ("and", ("move", "tackle"), ("move", "attack order"))),
+    ("moves tackle and speed > 100", ("and", ("move", "tackle"), ("speed", (">", 100.0)))),
+])
+def testNamesStartingWithAQualifier(expression, expected):
+    assert parse(expression) == expected
+
+def testNamesStartingWithAQualifierMatchTheSameItems():
+    assert collect("pokemon with moves tackle, defense curl") == collect("pokemon with moves tackle and moves defense curl")
+    assert collect("pokemon with ability levitate or speed boost") == collect("pokemon with ability levitate or ability speed boost")
+
+def testRangeQualifierWithoutANumberStillFails():
+    with pytest.raises(Fail, match="must be compared to a number"):
+        parse("speed fast")
+
+@pytest.mark.parametrize("expression, expected", [
+    ("type fire or type water and speed > 100", ("or", ("type", "fire"), ("and", ("type", "water"), ("speed", (">", 100.0))))),
+    ("not type fire and speed > 100", ("and", ("not", ("type", "fire")), ("speed", (">", 100.0)))),
+    ("not (type fire or type water)", ("not", ("or", ("type", "fire"), ("type", "water")))),
+    ("(type fire or type water) and speed > 100", ("and", ("or", ("type", "fire"), ("type", "water")), ("speed", (">", 100.0)))),
+])
+def testPrecedence(expression, expected):
+    assert parse(expression) == expected
+
+@pytest.mark.parametrize("expression, expected", [
+    ("moves tackle, growl, ember", ("and", ("move", "tackle"), ("move", "growl"), ("move", "ember"))),
+    ("moves tackle, growl or ember", ("or", ("move", "tackle"), ("move", "growl"), ("move", "ember"))),
+])
+def testCommas(expression, expected):
+    assert parse(expression) == expected
+
+def testAtLeast():
+    assert parse("at least 2 of (type fire, speed > 100, ability blaze)") == ("at least 2", ("type", "fire"), ("speed", (">", 100.0)), ("ability", "blaze"))
+
+def testAtLeastMatchesItemsInEnoughGroups():
+    matches = [POKEDEX.get(name) for name in collect("pokemon with at least 2 of (type fire, speed > 100, ability blaze)")]
+    assert all(sum(["fire" in pkmn.getTypes(), pkmn.getBase("speed").getVal() > 100, "blaze" in [*pkmn.getAbilities(), pkmn.getHiddenAbility()]]) >= 2 for pkmn in matches)
+
+@pytest.mark.parametrize("expression, token", [
+    ("type fire and", None),
+    ("(type fire", None),
+    ("type fire or not", None),
+    ("type fire)", ")"),
+])
+def testBadSyntax(expression, token):
+    with pytest.raises(Fail) as e:
+        parse(expression)
+    assert (f"`{token}` doesn't belong there." if token else "The query ended too early.") in e.value.message
+
+def testBadOrder():
+    with pytest.raises(Fail) as e:
+        collect("pokemon with speed > 100 sort by bogus")
+    assert "Results can't be sorted by `bogus`." in e.value.message
+
+def testOrder():
+    matches = [POKEDEX.get(name) for name in collect("pokemon with speed > 100 sort by speed desc limit 3")]
+    speeds = [pkmn.getBase("speed").getVal() for pkmn in matches]
+    assert len(matches) <= 3 and speeds == sorted(speeds, reverse=True)
+
+@pytest.mark.parametrize("query", ["pokemon with speed > 0", "pokemon with speed > 0 sort by speed", 'moves with effect "raises speed"'])
+def testCollectingDoesNotBuildItems(query):
+    built = set(POKEDEX.items)
+    names = collect(query)
+    assert names and all(isinstance(name, str) for name in names)
+    assert set(POKEDEX.items) == built
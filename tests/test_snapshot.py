@@ -0,0 +1,22 @@
+from back.snapshot import getCodeStamp, loadSnapshot, readSnapshot, writeSnapshot
+
+def testSnapshotGoesStaleWhenTheCodeChanges(tmp_path):
+    source, code = tmp_path / "dex.json", tmp_path / "columns.py"
+    source.write_text("{}")
+    code.write_text("STORE = 1\n")
+    version = (1, getCodeStamp([str(code)]))
+    writeSnapshot(str(source), version, {"built": 1})
+    assert readSnapshot(str(source), version) == {"built": 1}
+    code.write_text("STORE = 2\n")
+    edited = (1, getCodeStamp([str(code)]))
+    assert edited != version
+    assert readSnapshot(str(source), edited) is None
+    assert loadSnapshot(str(source), edited, lambda: {"built": 2}) == {"built": 2}
+    assert readSnapshot(str(source), edited) == {"built": 2}
+
+def testSnapshotGoesStaleWhenTheSourceChanges(tmp_path):
+    source = tmp_path / "dex.json"
+    source.write_text("{}")
+    writeSnapshot(str(source), 1, {"built": 1})
+    source.write_text('{"a": 1}')
+    assert readSnapshot(str(source), 1) is None